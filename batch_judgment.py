@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+Batch judgment runner: many simulated souls across a process pool
+Compatible with Python 2.7
+Dependencies: numpy
+
+Every run builds a headless SoulEngine, picks a selection policy (which sins
+and virtues to carry) and a walker (how to cross the maze), generates the
+maze, walks it and records the judgment. Runs are handed to worker processes
+in chunks and come back as column arrays, which are appended to one raw
+little-endian file per column and folded into per-policy aggregates as they
+arrive, so memory stays flat however many runs are made.
+
+Usage: python batch_judgment.py OUTPUT_DIR [--runs N] [--workers N] [--seed N]
+           [--selection random,greedy] [--walker optimal,wanderer,wall,tremaux,frontier]
+
+Read the results back with read_columns(OUTPUT_DIR); summary.json holds the
+aggregates and schema.json the column layout.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from bots import BOTS, get_bot
+from engine import MAZE_HEIGHT, MAZE_WIDTH, SoulEngine, default_sins, default_virtues
+from maze_generator import derive_seed
+
+DESTINATIONS = ("PURGATORY", "THE GRAY REALM", "THE LOWER CIRCLES", "THE ABYSS")
+UNJUDGED = -1  # Destination code of a walk cut off by the step limit
+CHUNK_RUNS = 64  # Runs per task; large enough that pickling results is noise
+WANDER_RATE = 0.3  # Chance the wanderer ignores the optimal step
+
+# (name, dtype) of every output column; stored little-endian. The bitmasks
+# hold catalogs of up to 16 items; batch_columns widens them for larger ones.
+COLUMNS = (
+    ("run", "<i8"),
+    ("seed", "<u8"),
+    ("selection", "u1"),       # Index into the selection policies of the batch
+    ("walker", "u1"),          # Index into the walkers of the batch
+    ("sins", "<u2"),           # Bitmask over the sin catalog
+    ("virtues", "<u2"),        # Bitmask over the virtue catalog
+    ("sin_weight", "<i2"),
+    ("virtue_weight", "<i2"),
+    ("moral_balance", "<i4"),
+    ("steps", "<i4"),
+    ("path_cost", "<i4"),
+    ("optimal_cost", "<i4"),
+    ("path_efficiency", "<f8"),  # NaN when unjudged
+    ("destination", "i1"),     # Index into DESTINATIONS, or UNJUDGED
+)
+
+
+def select_none(engine, rng):
+    """Carry nothing"""
+
+
+def select_random(engine, rng):
+    """Offer every item once in random order, keeping about half that fit"""
+    order = list(range(len(engine.selection.items)))
+    rng.shuffle(order)
+    for index in order:
+        if rng.random() < 0.5:
+            engine.selection.toggle(index)  # Refused when it does not fit
+
+
+def select_greedy(engine, rng):
+    """Take the items with the best moral value per unit of weight first"""
+    selection = engine.selection
+    order = sorted(range(len(selection.items)),
+                   key=lambda i: -float(selection.values[i]) / max(selection.weights[i], 1))
+    for index in order:
+        if selection.values[index] > 0:
+            selection.toggle(index)
+
+
+def select_optimal(engine, rng):
+    """Take the knapsack optimum for the soul capacity"""
+    chosen = set(id(item) for item in engine.optimal_burden.chosen)
+    for index, item in enumerate(engine.selection.items):
+        if id(item) in chosen:
+            engine.selection.toggle(index)
+
+
+SELECTION_POLICIES = {
+    "none": select_none,
+    "random": select_random,
+    "greedy": select_greedy,
+    "optimal": select_optimal,
+}
+
+
+def walk_optimal(engine, rng, max_steps):
+    """Follow the goal distance field, never wasting a step"""
+    field = engine.goal_distances
+    steps = 0
+    while not engine.maze_completed and steps < max_steps:
+        x, y = engine.player_pos
+        step = field.next_step(x, y)
+        if step is None:
+            return
+        engine.move(step[0] - x, step[1] - y)
+        steps += 1
+
+
+def walk_wanderer(engine, rng, max_steps):
+    """Mostly optimal, but takes a random open step WANDER_RATE of the time"""
+    field = engine.goal_distances
+    maze = engine.maze
+    moves = ((1, 0), (-1, 0), (0, 1), (0, -1))
+    steps = 0
+    while not engine.maze_completed and steps < max_steps:
+        x, y = engine.player_pos
+        if rng.random() < WANDER_RATE:
+            options = [(dx, dy) for dx, dy in moves if maze.is_open(x + dx, y + dy)]
+            dx, dy = rng.choice(options)
+        else:
+            step = field.next_step(x, y)
+            if step is None:
+                return
+            dx, dy = step[0] - x, step[1] - y
+        engine.move(dx, dy)
+        steps += 1
+
+
+WALKERS = {
+    "optimal": walk_optimal,
+    "wanderer": walk_wanderer,
+}
+
+
+def get_walker(name):
+    """A walk(engine, rng, max_steps) function: one of WALKERS or a bot from bots.BOTS"""
+    if name in WALKERS:
+        return WALKERS[name]
+    return get_bot(name)().walk
+
+
+def _mask_dtype(catalog):
+    """Smallest little-endian unsigned dtype with one bit per catalog item"""
+    for dtype in ("<u2", "<u4", "<u8"):
+        if len(catalog) <= 8 * np.dtype(dtype).itemsize:
+            return dtype
+    raise ValueError("a catalog of %d items does not fit a 64-bit mask" % len(catalog))
+
+
+def batch_columns(sins, virtues):
+    """COLUMNS with the sins and virtues bitmasks sized for these catalogs"""
+    sized = {"sins": _mask_dtype(sins), "virtues": _mask_dtype(virtues)}
+    return tuple((name, sized.get(name, dtype)) for name, dtype in COLUMNS)
+
+
+def _mask(items, chosen):
+    chosen = set(id(item) for item in chosen)
+    return sum(1 << i for i, item in enumerate(items) if id(item) in chosen)
+
+
+def simulate_chunk(task):
+    """Simulate runs [start, start + count); returns {column: array}"""
+    start, count, seed, selections, walkers, width, height, max_steps, layout = task
+    columns = dict((name, np.zeros(count, dtype=dtype)) for name, dtype in layout)
+    columns["path_efficiency"].fill(np.nan)
+    columns["destination"].fill(UNJUDGED)
+
+    for row in range(count):
+        run = start + row
+        run_seed = derive_seed(seed, "run:%d" % run)
+        rng = random.Random(run_seed)
+        selection = rng.randrange(len(selections))
+        walker = rng.randrange(len(walkers))
+
+        engine = SoulEngine(width=width, height=height, maze_seed=run_seed)
+        SELECTION_POLICIES[selections[selection]](engine, rng)
+        engine.finalize_selections()
+        engine.generate_moral_maze()
+        get_walker(walkers[walker])(engine, rng, max_steps)
+
+        columns["run"][row] = run
+        columns["seed"][row] = run_seed
+        columns["selection"][row] = selection
+        columns["walker"][row] = walker
+        columns["sins"][row] = _mask(engine.sins, engine.chosen_sins)
+        columns["virtues"][row] = _mask(engine.virtues, engine.chosen_virtues)
+        columns["sin_weight"][row] = engine.sin_weight
+        columns["virtue_weight"][row] = engine.virtue_weight
+        columns["moral_balance"][row] = engine.moral_balance
+        columns["steps"][row] = len(engine.player_path) - 1
+        columns["path_cost"][row] = engine.path_cost_so_far
+        columns["optimal_cost"][row] = engine.goal_distances.distance(*engine.start_pos) or 0
+        if engine.maze_completed:
+            columns["path_efficiency"][row] = engine.path_efficiency
+            columns["destination"][row] = DESTINATIONS.index(engine.final_destination)
+    return columns
+
+
+class ColumnarWriter(object):
+    """Appends chunks of column arrays to one raw file per column.
+
+    Rows are written in the order chunks arrive, which need not be run
+    order; the run column says which run each row is. close() writes
+    schema.json with the dtypes and row count needed to map the files back.
+    """
+    def __init__(self, directory, columns=COLUMNS):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.directory = directory
+        self.columns = columns
+        self.rows = 0
+        self.chunks = 0
+        self._files = dict((name, open(os.path.join(directory, name + ".bin"), "wb"))
+                           for name, _ in columns)
+
+    def append(self, chunk):
+        count = None
+        for name, dtype in self.columns:
+            values = np.ascontiguousarray(chunk[name], dtype=dtype)
+            if count is None:
+                count = len(values)
+            elif len(values) != count:
+                raise ValueError("column %s has %d rows, expected %d" % (name, len(values), count))
+            self._files[name].write(values.tobytes())
+        self.rows += count or 0
+        self.chunks += 1
+
+    def close(self, metadata=None):
+        for handle in self._files.values():
+            handle.close()
+        schema = {"rows": self.rows, "chunks": self.chunks,
+                  "columns": [[name, dtype] for name, dtype in self.columns],
+                  "metadata": metadata or {}}
+        with open(os.path.join(self.directory, "schema.json"), "w") as handle:
+            json.dump(schema, handle, indent=2, sort_keys=True)
+
+
+def read_columns(directory):
+    """{column: read-only memory-mapped array} for a finished batch"""
+    with open(os.path.join(directory, "schema.json")) as handle:
+        schema = json.load(handle)
+    columns = {}
+    for name, dtype in schema["columns"]:
+        path = os.path.join(directory, name + ".bin")
+        if schema["rows"]:
+            columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(schema["rows"],))
+        else:
+            columns[name] = np.zeros(0, dtype=dtype)
+    return columns
+
+
+class JudgmentAggregator(object):
+    """Running per-(selection, walker) statistics, updated one chunk at a time"""
+    def __init__(self, selections, walkers):
+        self.selections = selections
+        self.walkers = walkers
+        shape = (len(selections), len(walkers))
+        self.runs = np.zeros(shape, dtype=np.int64)
+        self.judged = np.zeros(shape, dtype=np.int64)
+        self.destinations = np.zeros(shape + (len(DESTINATIONS),), dtype=np.int64)
+        self.efficiency_sum = np.zeros(shape)
+        self.efficiency_squares = np.zeros(shape)
+        self.efficiency_max = np.zeros(shape)
+        self.balance_sum = np.zeros(shape)
+
+    def add(self, chunk):
+        groups = chunk["selection"].astype(np.intp) * len(self.walkers) + chunk["walker"]
+        cells = self.runs.size
+        judged = chunk["destination"] != UNJUDGED
+        efficiency = np.where(judged, chunk["path_efficiency"], 0.0)
+
+        self.runs += np.bincount(groups, minlength=cells).reshape(self.runs.shape)
+        self.judged += np.bincount(groups, weights=judged, minlength=cells).astype(np.int64).reshape(self.runs.shape)
+        self.balance_sum += np.bincount(groups, weights=chunk["moral_balance"],
+                                        minlength=cells).reshape(self.runs.shape)
+        self.efficiency_sum += np.bincount(groups, weights=efficiency, minlength=cells).reshape(self.runs.shape)
+        self.efficiency_squares += np.bincount(groups, weights=efficiency * efficiency,
+                                               minlength=cells).reshape(self.runs.shape)
+        flat_max = self.efficiency_max.reshape(-1)
+        np.maximum.at(flat_max, groups, efficiency)
+
+        destination_groups = groups[judged] * len(DESTINATIONS) + chunk["destination"][judged]
+        self.destinations += np.bincount(destination_groups,
+                                         minlength=self.destinations.size).reshape(self.destinations.shape)
+
+    def summary(self):
+        """JSON-ready list of per-policy statistics"""
+        groups = []
+        for s, selection in enumerate(self.selections):
+            for w, walker in enumerate(self.walkers):
+                runs, judged = int(self.runs[s, w]), int(self.judged[s, w])
+                if not runs:
+                    continue
+                mean = self.efficiency_sum[s, w] / judged if judged else None
+                variance = self.efficiency_squares[s, w] / judged - mean * mean if judged else None
+                groups.append({
+                    "selection": selection,
+                    "walker": walker,
+                    "runs": runs,
+                    "judged": judged,
+                    "mean_moral_balance": self.balance_sum[s, w] / runs,
+                    "mean_efficiency": mean,
+                    "std_efficiency": max(variance, 0.0) ** 0.5 if judged else None,
+                    "max_efficiency": float(self.efficiency_max[s, w]) if judged else None,
+                    "destinations": dict(zip(DESTINATIONS, self.destinations[s, w].tolist())),
+                })
+        return groups
+
+
+def run_batch(directory, runs, seed=0, selections=("random",), walkers=("optimal",),
+              workers=None, width=MAZE_WIDTH, height=MAZE_HEIGHT, max_steps=None,
+              chunk_runs=CHUNK_RUNS, progress=None):
+    """Simulate runs souls into directory; returns the aggregate summary.
+
+    workers: processes to use (all cores if None; 1 runs in this process).
+    max_steps: walk length after which a soul goes unjudged (default 20
+    times the number of cells). progress, if given, is called with the
+    number of finished runs after every chunk.
+    """
+    for name in selections:
+        if name not in SELECTION_POLICIES:
+            raise ValueError("Unknown selection policy: %r" % (name,))
+    for name in walkers:
+        if name not in WALKERS and name not in BOTS:
+            raise ValueError("Unknown walker: %r" % (name,))
+    selections, walkers = list(selections), list(walkers)
+    if max_steps is None:
+        max_steps = 20 * width * height
+    layout = batch_columns(default_sins(), default_virtues())
+    tasks = [(start, min(chunk_runs, runs - start), seed, selections, walkers, width, height,
+              max_steps, layout)
+             for start in range(0, runs, chunk_runs)]
+
+    writer = ColumnarWriter(directory, layout)
+    aggregator = JudgmentAggregator(selections, walkers)
+    workers = workers or multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(workers) if workers > 1 else None
+    started = time.time()
+    try:
+        results = pool.imap_unordered(simulate_chunk, tasks) if pool else map(simulate_chunk, tasks)
+        for chunk in results:
+            writer.append(chunk)
+            aggregator.add(chunk)
+            if progress is not None:
+                progress(writer.rows)
+    except BaseException:
+        if pool:
+            pool.terminate()
+        raise
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    summary = {"runs": runs, "seed": seed, "workers": workers,
+               "width": width, "height": height, "max_steps": max_steps,
+               "seconds": time.time() - started, "groups": aggregator.summary()}
+    writer.close({"selections": selections, "walkers": walkers,
+                  "destinations": list(DESTINATIONS), "seed": seed})
+    with open(os.path.join(directory, "summary.json"), "w") as handle:
+        json.dump(summary, handle, indent=2, sort_keys=True)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("output", help="directory for the column files and summary")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--selection", default="random",
+                        help="comma-separated policies from: %s" % ", ".join(sorted(SELECTION_POLICIES)))
+    parser.add_argument("--walker", default="optimal",
+                        help="comma-separated walkers from: %s" % ", ".join(sorted(WALKERS) + list(BOTS)))
+    parser.add_argument("--size", type=int, nargs=2, default=(MAZE_WIDTH, MAZE_HEIGHT),
+                        metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--chunk", type=int, default=CHUNK_RUNS, help="runs per worker task")
+    args = parser.parse_args()
+
+    def progress(done):
+        sys.stderr.write("\r%d/%d runs" % (done, args.runs))
+        sys.stderr.flush()
+
+    summary = run_batch(args.output, args.runs, seed=args.seed,
+                        selections=args.selection.split(","), walkers=args.walker.split(","),
+                        workers=args.workers, width=args.size[0], height=args.size[1],
+                        max_steps=args.max_steps, chunk_runs=args.chunk, progress=progress)
+    sys.stderr.write("\n")
+
+    print("%d runs in %.1f s (%.0f runs/hour) on %d workers"
+          % (args.runs, summary["seconds"], 3600 * args.runs / max(summary["seconds"], 1e-9),
+             summary["workers"]))
+    header = "%-10s %-10s %7s %9s %8s  %s" % ("selection", "walker", "runs", "balance", "effic.",
+                                              " / ".join(DESTINATIONS))
+    print(header)
+    print("-" * len(header))
+    for group in summary["groups"]:
+        efficiency = group["mean_efficiency"]
+        print("%-10s %-10s %7d %9.2f %8s  %s"
+              % (group["selection"], group["walker"], group["runs"], group["mean_moral_balance"],
+                 "-" if efficiency is None else "%.3f" % efficiency,
+                 " / ".join(str(group["destinations"][name]) for name in DESTINATIONS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+"""
+Hot path benchmark suite
+Times maze generation (plain and with each sin and virtue effect), path
+solving, live maze shifts, fog reveals, particle updates and the per-state draw functions over
+a range of maze sizes, reports throughput, percentiles and peak memory, and
+can save the results as JSON and compare them against a stored baseline.
+
+Usage: python benchmarks/hot_paths.py [--sizes 51x35,1001x1001] [--only generate,solve]
+                                      [--output results.json] [--baseline baseline.json]
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+from timeit import default_timer
+
+import numpy as np
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2: no allocation tracing, peak memory is reported as null
+    tracemalloc = None
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import MAZE_HEIGHT, MAZE_WIDTH, SoulEngine, default_sins, default_virtues
+from maze_generator import MazeGenerator
+from particles import ParticleSystem
+from pathfinding import PATHFINDERS, find_path
+from visibility import VisibilityMask
+
+GROUPS = ("generate", "solve", "shift", "reveal", "particles", "draw")
+DEFAULT_SIZES = "51x35,201x201,1001x1001"
+QUICK_SIZES = "51x35,201x201"
+LARGE_SIZES = "51x35,201x201,1001x1001,4001x4001"
+SEED = 2024
+REVEAL_STEPS = 256  # Reveals per sample, walked along the optimal path
+SHIFT_WALLS = 8  # Interior walls opened and closed again by each shift run
+PARTICLE_COUNTS = (1000, 10000, 50000)
+PARTICLE_STEADY_LIVES = (10 ** 6, 10 ** 6)  # Nobody dies: update without compaction
+PARTICLE_CHURN_LIVES = (1, 60)  # Some particles die every update
+DEFAULT_TOLERANCE = 0.25  # Slowdown (or memory growth) that counts as a regression
+MEMORY_SLACK = 64 * 1024  # Peak growth below this many bytes is noise (first renders, caches)
+TIME_SLACK = 50e-6  # Slowdown below this many seconds is noise, whatever the ratio
+GATE_MIN_SAMPLES = 5  # Cases with fewer samples (either run) are shown but never fail the check
+RECHECKS = 3  # Extra timing rounds for cases that look slower, before calling them regressions
+
+
+class Case(object):
+    """One benchmarked operation.
+
+    run() performs the operation once; setup(), if given, runs untimed
+    before every sample to put the state back (a fresh fog, a full particle
+    buffer). units is how many cells, reveals, particles or frames one run
+    processes, for the throughput column.
+    """
+    def __init__(self, group, name, size, run, units, unit, setup=None):
+        self.group = group
+        self.name = name
+        self.size = size
+        self.run = run
+        self.units = units
+        self.unit = unit
+        self.setup = setup
+
+    @property
+    def key(self):
+        return "%s/%s/%s" % (self.group, self.name, self.size)
+
+
+def parse_sizes(text):
+    sizes = []
+    for part in text.split(","):
+        try:
+            width, height = (int(value) for value in part.lower().split("x"))
+        except ValueError:
+            raise argparse.ArgumentTypeError("sizes look like 51x35,201x201, got %r" % part)
+        if width < 5 or height < 5 or width % 2 == 0 or height % 2 == 0:
+            raise argparse.ArgumentTypeError("maze sizes must be odd and at least 5x5, got %r" % part)
+        sizes.append((width, height))
+    return sizes
+
+
+def size_label(width, height):
+    return "%dx%d" % (width, height)
+
+
+def generation_cases(width, height):
+    """generate_sinful_maze with no burden, then with each sin and each virtue alone"""
+    label = size_label(width, height)
+    burdens = [("none", [], [])]
+    burdens += [(sin.name, [sin], []) for sin in default_sins()]
+    burdens += [(virtue.name, [], [virtue]) for virtue in default_virtues()]
+    cases = []
+    for name, sins, virtues in burdens:
+        generator = MazeGenerator(width, height, seed=SEED)
+        run = (lambda generator=generator, sins=sins, virtues=virtues:
+               generator.generate_sinful_maze(sins, virtues))
+        cases.append(Case("generate", name, label, run, width * height, "cells"))
+    return cases
+
+
+def _engine(width, height, sins=()):
+    """An engine of the given size with its maze generated for sins"""
+    engine = SoulEngine(width=width, height=height, maze_seed=SEED)
+    engine.chosen_sins = list(sins)
+    engine.generate_moral_maze()
+    return engine
+
+
+def solve_cases(width, height):
+    """dijkstra_pathfinding with every pathfinder, on a plain maze and on one
+    carrying every sin (and so a cost layer).
+
+    The engine keeps its junction graph between queries, so "junction" times
+    a repeated query and "junction-build" a one-off solve including the graph.
+    """
+    label = size_label(width, height)
+    cases = []
+    for maze_name, sins in (("plain", ()), ("all-sins", default_sins())):
+        engine = _engine(width, height, sins)
+        for method in PATHFINDERS:
+            def run(engine=engine, method=method):
+                engine.pathfinder = method
+                return engine.dijkstra_pathfinding(engine.start_pos, engine.goal_pos)
+            cases.append(Case("solve", "%s %s" % (method, maze_name), label, run,
+                              width * height, "cells"))
+        run = (lambda engine=engine:
+               find_path(engine.maze, engine.start_pos, engine.goal_pos, "junction"))
+        cases.append(Case("solve", "junction-build %s" % maze_name, label, run,
+                          width * height, "cells"))
+    return cases
+
+
+def shift_cases(width, height):
+    """Live maze changes repaired by shift_maze, as a maze shifting under the player would be.
+
+    Each run opens each of SHIFT_WALLS walls in turn, repairing after
+    opening and again after closing it, so the maze is back where it started
+    and every run does the same work.
+    """
+    label = size_label(width, height)
+    engine = _engine(width, height)
+    rng = np.random.RandomState(SEED)
+    # Walls between two cells, so opening them makes a shortcut
+    walls = [(x, y) for x, y in zip(rng.randint(1, width - 1, 8 * SHIFT_WALLS),
+                                    rng.randint(1, height - 1, 8 * SHIFT_WALLS))
+             if (x + y) % 2 == 1 and not engine.maze.is_open(x, y)][:SHIFT_WALLS]
+
+    def run():
+        for x, y in walls:
+            for _ in range(2):
+                engine.maze.buffer[y * width + x] ^= 1
+                engine.shift_maze([(x, y)])
+    return [Case("shift", "toggle walls", label, run, 2 * len(walls), "changes")]
+
+
+def reveal_cases(width, height):
+    """reveal_around_player at the first REVEAL_STEPS cells of the optimal path, from a fresh fog"""
+    label = size_label(width, height)
+    cases = []
+    for mode in ("radius", "shadowcast"):
+        engine = _engine(width, height)
+        engine.vision_mode = mode
+        positions = engine.shortest_path[:REVEAL_STEPS]
+
+        def setup(engine=engine):
+            engine.visited_cells = VisibilityMask(engine.width, engine.height)
+
+        def run(engine=engine, positions=positions):
+            for position in positions:
+                engine.player_pos = position
+                engine.reveal_around_player()
+        cases.append(Case("reveal", mode, label, run, len(positions), "reveals", setup))
+    return cases
+
+
+def _fill_particles(system, count, lives, rng):
+    """Refill system with count particles, lives drawn from the (low, high) range"""
+    system.clear()
+    system.add_particles(rng.uniform(0, 1400, count), rng.uniform(0, 900, count), (200, 40, 40),
+                         rng.uniform(-1, 1, count), rng.uniform(-2, 0, count),
+                         rng.randint(lives[0], lives[1] + 1, count))
+
+
+def particle_cases():
+    """ParticleSystem.update on full buffers, with and without particles dying"""
+    cases = []
+    rng = np.random.RandomState(SEED)
+    for count in PARTICLE_COUNTS:
+        for name, lives in (("steady", PARTICLE_STEADY_LIVES), ("churn", PARTICLE_CHURN_LIVES)):
+            system = ParticleSystem(capacity=count)
+            setup = (lambda system=system, count=count, lives=lives:
+                     _fill_particles(system, count, lives, rng))
+            cases.append(Case("particles", "update %s" % name, str(count), system.update,
+                              count, "particles", setup))
+    return cases
+
+
+def draw_cases():
+    """Every state's draw function, and the particle layer, against an offscreen surface.
+
+    The game only draws its own MAZE_WIDTH x MAZE_HEIGHT maze, so these run
+    at that size. Returns [] when pygame is not installed.
+    """
+    try:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        import pygame
+        import game
+    except ImportError:
+        return []
+
+    asylum = game.AsylumOfSins()
+    asylum.screen = pygame.Surface((game.WINDOW_WIDTH, game.WINDOW_HEIGHT))
+    asylum.engine = SoulEngine(maze_seed=SEED)
+    # A burden with something on both sides, then the maze walked halfway
+    for index in (0, 2, len(asylum.engine.sins) + 1):
+        asylum.engine.selection.toggle(index)
+    asylum.engine.finalize_selections()
+    asylum.generate_moral_maze()
+    route = asylum.engine.shortest_path
+    for x, y in route[1:len(route) // 2]:
+        asylum.engine.move(x - asylum.engine.player_pos[0], y - asylum.engine.player_pos[1])
+        asylum._cut_fog(asylum.engine.last_revealed)
+
+    # The intro, path view and judgment animate on the clock; each sample
+    # starts from the same fully revealed state so frames are comparable
+    def intro():
+        asylum.current_text_index = len(asylum.intro_texts)
+        asylum.text_timer = 10 ** 6  # Past the fade-in, so every line is opaque
+
+    label = size_label(MAZE_WIDTH, MAZE_HEIGHT)
+    cases = [Case("draw", "intro", label, asylum.draw_intro, 1, "frames", intro)]
+    for name in ("confession", "sin_selection", "virtue_selection",
+                 "knapsack_summary", "maze_prep", "maze"):
+        cases.append(Case("draw", name, label, getattr(asylum, "draw_" + name), 1, "frames"))
+
+    # The path view and judgment need the walk finished
+    def finish():
+        for x, y in route[len(route) // 2:]:
+            if asylum.engine.maze_completed:
+                break
+            asylum.engine.move(x - asylum.engine.player_pos[0], y - asylum.engine.player_pos[1])
+            asylum._cut_fog(asylum.engine.last_revealed)
+
+    def optimal_path_view():
+        finish()
+        asylum.optimal_path_animation = len(route) * 50 + 1  # Whole path and the prompt
+
+    def judgment():
+        finish()
+        asylum.text_timer = 10 ** 6  # Every judgment line on screen
+
+    cases.append(Case("draw", "optimal_path_view", label, asylum.draw_optimal_path_view,
+                      1, "frames", optimal_path_view))
+    cases.append(Case("draw", "judgment", label, asylum.draw_judgment, 1, "frames", judgment))
+
+    system = ParticleSystem()
+    rng = np.random.RandomState(SEED)
+    count = PARTICLE_COUNTS[-1]
+    cases.append(Case("draw", "particles %d" % count, label,
+                      lambda: system.draw(asylum.screen), 1, "frames",
+                      lambda: _fill_particles(system, count, PARTICLE_STEADY_LIVES, rng)))
+    return cases
+
+
+def measure_peak(case):
+    """Peak bytes traced by tracemalloc (Python and NumPy allocations) during one run"""
+    if tracemalloc is None:
+        return None
+    if case.setup is not None:
+        case.setup()
+    tracemalloc.start()
+    try:
+        case.run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def time_case(case, min_samples, max_samples, budget):
+    """Sample durations until min_samples and budget seconds are both reached.
+
+    Runs slower than the budget stop at min_samples, and everything stops at
+    ten times the budget once there is a sample, so the 4001x4001 cases take
+    one sample each instead of minutes. As in timeit, the cyclic garbage
+    collector is off while timing, so its pauses (which depend on whatever
+    earlier cases left on the heap) do not land in random samples.
+    """
+    durations = []
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = default_timer()
+        while len(durations) < max_samples:
+            elapsed = default_timer() - started
+            if durations and (elapsed >= 10 * budget or
+                              (elapsed >= budget and len(durations) >= min_samples)):
+                break
+            if case.setup is not None:
+                case.setup()
+            start = default_timer()
+            case.run()
+            durations.append(default_timer() - start)
+    finally:
+        if enabled:
+            gc.enable()
+    return durations
+
+
+def summarize(case, durations, peak):
+    samples = np.array(durations)
+    p50, p90, p99 = np.percentile(samples, (50, 90, 99))
+    mean = float(samples.mean())
+    return {
+        "group": case.group,
+        "name": case.name,
+        "size": case.size,
+        "unit": case.unit,
+        "units_per_op": case.units,
+        "samples": len(durations),
+        "mean": mean,
+        "p50": float(p50),
+        "p90": float(p90),
+        "p99": float(p99),
+        "min": float(samples.min()),
+        "max": float(samples.max()),
+        "ops_per_s": 1.0 / mean if mean else None,
+        "units_per_s": case.units / mean if mean else None,
+        "peak_bytes": peak
+    }
+
+
+def format_seconds(seconds):
+    if seconds >= 1:
+        return "%.2f s" % seconds
+    if seconds >= 1e-3:
+        return "%.2f ms" % (seconds * 1e3)
+    return "%.1f us" % (seconds * 1e6)
+
+
+def format_bytes(count):
+    if count is None:
+        return "-"
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return "%d %s" % (count, unit)
+        count //= 1024
+    return "%d GB" % count
+
+
+def result_key(result):
+    return "%s/%s/%s" % (result["group"], result["name"], result["size"])
+
+
+def slower(result, old, tolerance):
+    """Whether the best time grew past the tolerance and the absolute slack"""
+    return result["min"] > old["min"] * (1 + tolerance) + TIME_SLACK
+
+
+def compare(results, baseline, tolerance):
+    """Print best-time and peak memory ratios against the baseline; returns the regressed keys.
+
+    Times are compared by the fastest sample: noise from other processes
+    only ever adds time, so the minimum moves far less between identical
+    runs than the median does. A case regresses when its best time grows
+    by more than tolerance and TIME_SLACK together, or its peak memory by
+    more than tolerance and MEMORY_SLACK.
+    """
+    previous = dict((result_key(result), result) for result in baseline["results"])
+    header = "%-44s %10s %10s %7s %7s  %s" % ("case", "base best", "best", "time", "memory", "")
+    print(header)
+    print("-" * len(header))
+    regressions = []
+    for result in results:
+        key = result_key(result)
+        old = previous.get(key)
+        if old is None:
+            print("%-44s %10s %10s %7s %7s  new" % (key, "-", format_seconds(result["min"]), "-", "-"))
+            continue
+        time_ratio = result["min"] / old["min"] if old["min"] else 1.0
+        memory_ratio = None
+        if result["peak_bytes"] is not None and old.get("peak_bytes"):
+            memory_ratio = float(result["peak_bytes"]) / old["peak_bytes"]
+        regressed = (slower(result, old, tolerance) or
+                     (memory_ratio is not None and
+                      result["peak_bytes"] > old["peak_bytes"] * (1 + tolerance) + MEMORY_SLACK))
+        if min(result["samples"], old["samples"]) < GATE_MIN_SAMPLES:
+            status = "few samples" + (", slower" if regressed else "")
+        elif regressed:
+            regressions.append(key)
+            status = "REGRESSION"
+        else:
+            status = "faster" if time_ratio < 1 - tolerance else ""
+        print("%-44s %10s %10s %6.2fx %7s  %s"
+              % (key, format_seconds(old["min"]), format_seconds(result["min"]), time_ratio,
+                 "%.2fx" % memory_ratio if memory_ratio is not None else "-", status))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=parse_sizes, default=None,
+                        help="comma-separated WIDTHxHEIGHT maze sizes (default %s)" % DEFAULT_SIZES)
+    parser.add_argument("--quick", action="store_true", help="small sizes and budgets for smoke runs")
+    parser.add_argument("--large", action="store_true", help="add 4001x4001 (takes several minutes)")
+    parser.add_argument("--only", default=",".join(GROUPS),
+                        help="comma-separated groups to run, from %s" % ", ".join(GROUPS))
+    parser.add_argument("--min-samples", type=int, default=5)
+    parser.add_argument("--max-samples", type=int, default=1000)
+    parser.add_argument("--budget", type=float, default=None,
+                        help="seconds to sample each case for (default 1, 0.2 with --quick)")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory run")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved earlier with --output")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown or memory growth before a case regresses (default 0.25)")
+    args = parser.parse_args()
+
+    groups = [group.strip() for group in args.only.split(",") if group.strip()]
+    for group in groups:
+        if group not in GROUPS:
+            parser.error("unknown group %r (choose from %s)" % (group, ", ".join(GROUPS)))
+    if args.baseline and args.quick:
+        parser.error("--quick runs are too short to check against a baseline; drop --quick")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+        if baseline.get("quick"):
+            parser.error("%s is a --quick run, too short to check against" % args.baseline)
+    sizes = args.sizes or parse_sizes(QUICK_SIZES if args.quick else
+                                      LARGE_SIZES if args.large else DEFAULT_SIZES)
+    budget = args.budget if args.budget is not None else 0.2 if args.quick else 1.0
+    min_samples = min(args.min_samples, 3) if args.quick else args.min_samples
+
+    builders = []
+    for width, height in sizes:
+        if "generate" in groups:
+            builders.append(lambda width=width, height=height: generation_cases(width, height))
+        if "solve" in groups:
+            builders.append(lambda width=width, height=height: solve_cases(width, height))
+        if "shift" in groups:
+            builders.append(lambda width=width, height=height: shift_cases(width, height))
+        if "reveal" in groups:
+            builders.append(lambda width=width, height=height: reveal_cases(width, height))
+    if "particles" in groups:
+        builders.append(particle_cases)
+    if "draw" in groups:
+        builders.append(draw_cases)
+
+    header = "%-44s %7s %10s %10s %10s %14s %9s" % ("case", "samples", "p50", "p90", "p99",
+                                                     "throughput", "peak mem")
+    print(header)
+    print("-" * len(header))
+    results = []
+    timed = {}  # key -> (case, durations, peak), for rechecks
+    for build in builders:
+        cases = build()
+        if not cases and build is draw_cases:
+            print("draw cases skipped: pygame is not installed")
+        for case in cases:
+            durations = time_case(case, min_samples, args.max_samples, budget)
+            # Traced after timing, so one-time allocations (caches, first renders) are not counted
+            peak = None if args.no_memory else measure_peak(case)
+            result = summarize(case, durations, peak)
+            results.append(result)
+            timed[case.key] = (case, durations, peak)
+            print("%-44s %7d %10s %10s %10s %14s %9s"
+                  % (case.key, result["samples"], format_seconds(result["p50"]),
+                     format_seconds(result["p90"]), format_seconds(result["p99"]),
+                     "%.3g %s/s" % (result["units_per_s"], case.unit),
+                     format_bytes(peak)))
+            sys.stdout.flush()
+
+    if baseline is not None:
+        # Machines have slow phases that can outlast a case's whole budget:
+        # time anything that looks slower again and keep its fastest samples
+        previous = dict((result_key(result), result) for result in baseline["results"])
+        for _ in range(RECHECKS):
+            suspects = [index for index, result in enumerate(results)
+                        if result_key(result) in previous and
+                        slower(result, previous[result_key(result)], args.tolerance)]
+            if not suspects:
+                break
+            print("\nRetiming %d case(s) that look slower than the baseline" % len(suspects))
+            for index in suspects:
+                case, durations, peak = timed[result_key(results[index])]
+                durations.extend(time_case(case, min_samples, args.max_samples, budget))
+                results[index] = summarize(case, durations, peak)
+
+    if args.output:
+        report = {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "quick": args.quick,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "sizes": [size_label(width, height) for width, height in sizes],
+            "results": results
+        }
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+        print("\nResults written to %s" % args.output)
+
+    if baseline is not None:
+        print("")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\n%d case(s) regressed by more than %d%%" % (len(regressions), args.tolerance * 100))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Knapsack backend crossover benchmark
+Times the DP, rolling DP, branch-and-bound and meet-in-the-middle backends
+over a grid of item counts and capacities, checks they agree with each other
+and reports which one is fastest next to the automatic choice.
+
+Usage: python benchmarks/knapsack_backends.py [--seed N] [--quick]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from knapsack import (MITM_MAX_ITEMS, BranchAndBoundSolver, SearchBudgetExceeded,
+                      choose_backend, solve_knapsack)
+
+# Larger DP grids are skipped: they take minutes and only confirm the trend
+DP_BENCH_MAX_CELLS = 20000000
+MITM_BENCH_MAX_ITEMS = 34
+# Branch and bound blows up on some correlated catalogs; report those as "limit"
+BNB_BENCH_MAX_NODES = 2000000
+
+
+class BenchItem(object):
+    def __init__(self, weight, value):
+        self.weight = weight
+        self.value = value
+
+
+def make_catalog(rng, n, capacity, correlated=False):
+    """Random catalog where roughly a quarter of the items fit.
+
+    Correlated catalogs (value close to weight) are the hard case for
+    branch and bound, since the fractional bound stays loose.
+    """
+    max_weight = max(1, capacity * 8 // max(n, 1))
+    items = []
+    for _ in range(n):
+        weight = rng.randint(1, max_weight)
+        if correlated:
+            value = weight + max_weight // 10
+        else:
+            value = rng.randint(1, 1000)
+        # Non-integral values keep the optimum unique so chosen sets can be compared
+        items.append(BenchItem(weight, value + rng.random()))
+    return items
+
+
+def time_backend(items, capacity, backend):
+    start = time.time()
+    if backend == "bnb":
+        result = BranchAndBoundSolver(items, capacity).solve(max_nodes=BNB_BENCH_MAX_NODES)
+    else:
+        result = solve_knapsack(items, capacity, backend=backend)
+    return time.time() - start, result
+
+
+def eligible_backends(n, capacity):
+    backends = ["bnb"]
+    if n * (capacity + 1) <= DP_BENCH_MAX_CELLS:
+        backends[:0] = ["dp", "dp-rolling"]
+    if n <= min(MITM_MAX_ITEMS, MITM_BENCH_MAX_ITEMS):
+        backends.append("mitm")
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="smaller grid for smoke runs")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    item_counts = [8, 16, 24, 32, 100, 200] if not args.quick else [8, 16, 100]
+    capacities = [100, 1000, 10000, 100000, 10 ** 7] if not args.quick else [100, 10000]
+    grid = [(kind, n, capacity) for kind in ("uncorrelated", "correlated")
+            for n in item_counts for capacity in capacities]
+
+    header = "%-12s %6s %9s  %-10s %-10s %s" % ("catalog", "n", "W", "fastest", "auto", "timings (s)")
+    print(header)
+    print("-" * len(header))
+    for kind, n, capacity in grid:
+        items = make_catalog(rng, n, capacity, correlated=(kind == "correlated"))
+        timings = {}
+        reference = None
+        for backend in eligible_backends(n, capacity):
+            try:
+                elapsed, result = time_backend(items, capacity, backend)
+            except SearchBudgetExceeded:
+                timings[backend] = float('inf')
+                continue
+            timings[backend] = elapsed
+            chosen = sorted(id(item) for item in result.chosen)
+            if reference is None:
+                reference = (backend, result.value, chosen)
+            elif abs(result.value - reference[1]) > 1e-6 or chosen != reference[2]:
+                print("MISMATCH n=%d W=%d: %s=%r vs %s=%r"
+                      % (n, capacity, backend, result.value, reference[0], reference[1]))
+
+        fastest = min(timings, key=timings.get)
+        if timings[fastest] == float('inf'):
+            fastest = "-"
+        detail = "  ".join("%s=%.4f" % (name, timings[name]) if timings[name] != float('inf')
+                       else "%s=limit" % name for name in sorted(timings))
+        print("%-12s %6d %9d  %-10s %-10s %s"
+              % (kind, n, capacity, fastest, choose_backend(items, capacity), detail))
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Automated players for the headless engine, selectable by name
+Compatible with Python 2.7
+Dependencies: numpy
+
+A bot walks a SoulEngine's player from wherever it stands toward the goal.
+Fog-limited bots know only what a player would: the four cells around them
+(always inside the vision radius) and engine.visited_cells; the omniscient
+walker reads the goal distance field instead. Bots plan over flat cell
+indices (y * width + x) and hand whole routes to SoulEngine.follow, which
+checks, costs and reveals them with array operations, so no per-step
+move() call or frame clock is involved. Local rules are precomputed with
+NumPy as a table from (cell, heading) to the next state, so a step along a
+corridor is one table lookup.
+"""
+
+import random
+from array import array
+from collections import OrderedDict
+from itertools import repeat
+
+import numpy as np
+
+BOTS = OrderedDict()
+STEP_LIMIT_PER_CELL = 20  # Default walk budget: this many steps per maze cell
+
+
+def register_bot(name):
+    """Decorator adding a bot class to the registry"""
+    def decorator(cls):
+        cls.name = name
+        BOTS[name] = cls
+        return cls
+    return decorator
+
+
+def get_bot(name):
+    try:
+        return BOTS[name]
+    except KeyError:
+        raise ValueError("Unknown bot %r (choose from %s)" % (name, ", ".join(BOTS)))
+
+
+def _open_ahead(engine):
+    """Steps east, south, west and north, and per step a flat mask of the cells it leads into open"""
+    width = engine.width
+    open_cells = engine.maze.cells.reshape(-1) == 0
+    steps = (1, width, -1, -width)
+    ahead = []
+    for step in steps:
+        shifted = np.zeros(len(open_cells), dtype=bool)
+        if step > 0:
+            shifted[:-step] = open_cells[step:]
+        else:
+            shifted[-step:] = open_cells[:step]
+        ahead.append(shifted & open_cells)
+    return steps, ahead
+
+
+def _turn_table(steps, ahead, turns):
+    """state -> next state for a walker trying turns in order, state = cell * 4 + heading.
+
+    Headings index steps (clockwise), a turn is added to the heading, and
+    states with no open turn (or on walls) map to -1.
+    """
+    size = len(ahead[0])
+    base = np.arange(size, dtype=np.int32) * 4
+    table = np.full((size, 4), -1, dtype=np.int32)
+    for heading in range(4):
+        column = table[:, heading]
+        for turn in reversed(turns):  # Earlier turns overwrite later ones
+            direction = (heading + turn) & 3
+            np.copyto(column, base + (4 * steps[direction] + direction), where=ahead[direction])
+    return array("i", table.tobytes())
+
+
+class Bot(object):
+    """Navigation policy: walk(engine) moves the player until the goal or the step budget"""
+    name = None
+    omniscient = False
+
+    def walk(self, engine, rng=None, max_steps=None):
+        """Walk engine's player toward the goal; returns the number of steps taken"""
+        raise NotImplementedError
+
+    @staticmethod
+    def _setup(engine, rng, max_steps):
+        """(maze buffer, width, here, goal, rng, step budget) for a walk"""
+        if engine.maze is None:
+            raise ValueError("generate the maze before walking it")
+        cells = engine.maze.cells
+        if cells[0].min() == 0 or cells[-1].min() == 0 or cells[:, 0].min() == 0 or cells[:, -1].min() == 0:
+            # Bots step by index arithmetic and rely on the border to stop them
+            raise ValueError("bots need a maze enclosed by walls")
+        width = engine.width
+        here = engine.player_pos[1] * width + engine.player_pos[0]
+        goal = engine.goal_pos[1] * width + engine.goal_pos[0]
+        if max_steps is None:
+            max_steps = STEP_LIMIT_PER_CELL * width * engine.height
+        return engine.maze.buffer, width, here, goal, rng or random.Random(), max_steps
+
+
+@register_bot("wall")
+class WallFollower(Bot):
+    """Keeps one hand on the wall: solves any maze whose start and goal
+    both touch the outer wall, as they do here, even with loops."""
+    def __init__(self, hand="left"):
+        if hand not in ("left", "right"):
+            raise ValueError("hand must be 'left' or 'right', got %r" % (hand,))
+        # Headings in clockwise order (y grows downwards); turns tried in order
+        self.turns = (3, 0, 1, 2) if hand == "left" else (1, 0, 3, 2)
+
+    def walk(self, engine, rng=None, max_steps=None):
+        cells, width, here, goal, rng, max_steps = self._setup(engine, rng, max_steps)
+        steps, ahead = _open_ahead(engine)
+        table = _turn_table(steps, ahead, self.turns)
+        state = here * 4  # Facing east
+        if table[state] < 0:
+            return 0  # Walled in; past the first step the way back is always open
+        route = []
+        append = route.append
+        for _ in repeat(None, max_steps):
+            if state >> 2 == goal:
+                break
+            state = table[state]
+            append(state)
+        return engine.follow(np.array(route, dtype=np.intp) >> 2)
+
+
+@register_bot("tremaux")
+class TremauxWalker(Bot):
+    """Trémaux's algorithm: marks every passage as it is walked.
+
+    Arriving at a cell seen before along a fresh passage, it turns back;
+    otherwise it prefers unmarked passages (picked at random), then the one
+    it came by, then passages walked once. No passage is walked more than
+    twice, so the goal is always found in connected mazes.
+    """
+    def walk(self, engine, rng=None, max_steps=None):
+        cells, width, here, goal, rng, max_steps = self._setup(engine, rng, max_steps)
+        steps, ahead = _open_ahead(engine)
+        # Corridor cells have one way on, which the left-hand table takes;
+        # decisions are only made at junctions, dead ends, the start and goal
+        table = _turn_table(steps, ahead, (3, 0, 1, 2))
+        decide = bytearray((sum(mask.astype(np.uint8) for mask in ahead) != 2).tobytes())
+        decide[here] = decide[goal] = 1
+        # Marks per passage end, indexed like states: cell * 4 + direction out of it
+        marks = bytearray(4 * len(cells))
+        visited = bytearray(len(cells))
+        choice = rng.random
+        came = -1  # Passage end we arrived by
+        route = []
+        append = route.append
+        while here != goal and len(route) < max_steps:
+            if came >= 0 and visited[here] and marks[came] == 1:
+                leave = came
+            else:
+                fresh, once = [], []
+                for direction in range(4):
+                    end = here * 4 + direction
+                    if end != came and cells[here + steps[direction]] == 0:
+                        if marks[end] == 0:
+                            fresh.append(end)
+                        elif marks[end] == 1:
+                            once.append(end)
+                if fresh:
+                    leave = fresh[int(choice() * len(fresh))]
+                elif came >= 0 and marks[came] < 2:
+                    leave = came
+                elif once:
+                    leave = once[0]
+                else:
+                    break  # Everything walked twice: the goal is unreachable
+            visited[here] = 1
+            marks[leave] += 1
+
+            # Run the corridor to the next decision cell
+            direction = leave & 3
+            here += steps[direction]
+            state = here * 4 + direction
+            append(here)
+            while not decide[here]:
+                state = table[state]
+                here = state >> 2
+                append(here)
+            came = here * 4 + ((state + 2) & 3)
+            marks[came] += 1
+        return engine.follow(route[:max_steps])
+
+
+@register_bot("frontier")
+class FrontierExplorer(Bot):
+    """Frontier-based exploration over what the player has seen.
+
+    Plans only through revealed open cells of engine.visited_cells: heads
+    for the goal once it is seen and reachable, otherwise for the nearest
+    frontier cell (revealed, open, next to an unrevealed cell), breaking
+    ties toward the goal. Each route ends where new cells come into view,
+    so it is followed whole and the plan redone from there.
+    """
+    def walk(self, engine, rng=None, max_steps=None):
+        cells, width, here, goal, rng, max_steps = self._setup(engine, rng, max_steps)
+        seen = engine.visited_cells.bits
+        steps = (1, width, -1, -width)
+        goal_x, goal_y = engine.goal_pos
+        taken = 0
+        while not engine.maze_completed and taken < max_steps:
+            here = engine.player_pos[1] * width + engine.player_pos[0]
+            route = self._plan(cells, seen, steps, width, here, goal, goal_x, goal_y)
+            if not route:
+                break  # Nothing left to explore
+            taken += engine.follow(route[:max_steps - taken])
+        return taken
+
+    @staticmethod
+    def _plan(cells, seen, steps, width, here, goal, goal_x, goal_y):
+        """Route to the goal if seen and reachable, else to the nearest frontier cell"""
+        parent = {here: None}
+        layer = [here]
+        target = frontier = None
+        while layer:
+            candidates = []
+            next_layer = []
+            for index in layer:
+                if index == goal:
+                    target = goal
+                    break
+                for step in steps:
+                    neighbor = index + step
+                    if not seen[neighbor]:
+                        candidates.append(index)
+                    elif cells[neighbor] == 0 and neighbor not in parent:
+                        parent[neighbor] = index
+                        next_layer.append(neighbor)
+            if target is not None:
+                break
+            if candidates and frontier is None:
+                frontier = min(candidates, key=lambda index: abs(index % width - goal_x) +
+                               abs(index // width - goal_y))
+                if not seen[goal]:
+                    break  # Only a seen goal is worth searching further for
+            layer = next_layer
+        if target is None:
+            target = frontier
+        route = []
+        while target is not None and target != here:
+            route.append(target)
+            target = parent[target]
+        route.reverse()
+        return route
+
+
+@register_bot("omniscient")
+class OmniscientWalker(Bot):
+    """Sees through the fog: descends the goal distance field, never wasting a step"""
+    omniscient = True
+
+    def walk(self, engine, rng=None, max_steps=None):
+        cells, width, here, goal, rng, max_steps = self._setup(engine, rng, max_steps)
+        steps, ahead = _open_ahead(engine)
+        # Next cell downhill on the distance field, for every cell at once
+        distances = engine.goal_distances.distances
+        distances = np.frombuffer(distances, dtype=np.dtype(distances.typecode))
+        costs = (np.ones(len(distances), dtype=np.int32) if engine.maze.costs is None else
+                 np.frombuffer(engine.maze.costs, dtype=np.uint8).astype(np.int32))
+        index = np.arange(len(distances), dtype=np.int32)
+        downhill = np.full(len(distances), -1, dtype=np.int32)
+        for direction in (1, 3, 0, 2):  # Last written wins: west, east, north, south as in next_step
+            neighbor = np.clip(index + steps[direction], 0, len(distances) - 1)
+            step_down = ahead[direction] & (distances[neighbor] + costs[neighbor] == distances)
+            np.copyto(downhill, neighbor, where=step_down & (distances > 0))
+        downhill = array("i", downhill.tobytes())
+        if here != goal and downhill[here] < 0:
+            return 0  # The goal cannot be reached from here
+
+        route = []
+        append = route.append
+        for _ in repeat(None, max_steps):
+            if here == goal:
+                break
+            here = downhill[here]
+            append(here)
+        return engine.follow(route)
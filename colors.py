@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+Named RGB colours shared by the game logic and the renderer
+Compatible with Python 2.7
+Dependencies: none
+"""
+
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+RED = (220, 20, 20)
+DARK_RED = (139, 0, 0)
+BLOOD_RED = (102, 0, 0)
+GREEN = (50, 200, 50)
+DARK_GREEN = (0, 100, 0)
+BLUE = (30, 144, 255)
+GRAY = (128, 128, 128)
+DARK_GRAY = (64, 64, 64)
+PURPLE = (128, 0, 128)
+ORANGE = (255, 140, 0)
+YELLOW = (255, 215, 0)
+GOLD = (255, 215, 0)
+SILVER = (192, 192, 192)
+CRIMSON = (220, 20, 60)
+SHADOW = (25, 25, 25)
+FLAME = (255, 69, 0)
+FOG_COLOR = (30, 30, 30)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""
+Dirty-rectangle presentation of the game screen
+Compatible with Python 2.7
+Dependencies: pygame
+"""
+
+import pygame
+
+MAX_DIRTY_RECTS = 128  # Past this many, one bounding rect is cheaper to push
+
+
+def merge_rects(rects):
+    """Fold overlapping rects together so each region is pushed once"""
+    merged = []
+    for rect in sorted(rects, key=lambda rect: (rect.y, rect.x)):
+        index = rect.collidelist(merged)
+        if index < 0:
+            merged.append(rect)
+        else:
+            merged[index] = merged[index].union(rect)
+    return merged
+
+
+class DirtyRectCompositor(object):
+    """Tracks which screen regions changed since the last present.
+
+    Drawing still goes to the display surface; callers mark() the regions
+    they changed (or mark_all() after a full redraw), and present() pushes
+    only those with pygame.display.update instead of flipping the whole
+    screen. A frame with nothing marked costs nothing to present.
+    """
+    def __init__(self, screen):
+        self.screen = screen
+        self.bounds = screen.get_rect()
+        self._rects = []
+        self._full = True
+
+    @property
+    def dirty(self):
+        return self._full or bool(self._rects)
+
+    def mark(self, rect):
+        rect = self.bounds.clip(pygame.Rect(rect))
+        if rect.width and rect.height:
+            self._rects.append(rect)
+
+    def mark_many(self, rects):
+        for rect in rects:
+            self.mark(rect)
+
+    def mark_all(self):
+        self._full = True
+
+    def present(self):
+        """Push the changed regions to the display; returns the rects pushed"""
+        if self._full:
+            pygame.display.flip()
+            rects = [self.bounds]
+        else:
+            rects = merge_rects(self._rects)
+            if len(rects) > MAX_DIRTY_RECTS:
+                rects = [rects[0].unionall(rects[1:])]
+            if rects:
+                pygame.display.update(rects)
+        self._rects = []
+        self._full = False
+        return rects
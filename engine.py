@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Headless game logic for ASYLUM OF SINS
+Compatible with Python 2.7
+Dependencies: numpy
+
+SoulEngine owns everything that decides the outcome of a run: the sin and
+virtue selection, the maze built from it, movement, fog of war and the final
+judgment. It never imports pygame, so runs can be simulated and benchmarked
+without a display; game.AsylumOfSins only draws its state and feeds it input.
+"""
+
+import random
+
+from colors import (BLOOD_RED, BLUE, CRIMSON, DARK_GRAY, DARK_GREEN, FLAME, GOLD, GRAY, GREEN,
+                    ORANGE, PURPLE, SILVER, WHITE, YELLOW)
+from knapsack import SelectionState, moral_frontier, moral_value, optimal_burden
+from maze_cache import MazeCache, maze_cache_key
+from maze_generator import MazeGenerator
+from pathfinding import DynamicDistanceField, JunctionGraph, find_path, path_cost
+from visibility import VisibilityMask
+
+MAZE_WIDTH = 51
+MAZE_HEIGHT = 35
+SOUL_CAPACITY = 25
+VISION_RADIUS = 3  # How far player can see
+VISION_MODE = "radius"  # radius (sees through walls) or shadowcast (line of sight)
+MAZE_ALGORITHM = "backtracker"  # backtracker, eller, kruskal, prim or wilson
+PATHFINDER = "bfs"  # bfs, astar, bidirectional, dial or junction
+
+# Movement directions by name, as (dx, dy)
+MOVES = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)}
+
+
+class Item(object):
+    def __init__(self, name, weight, value, description, color):
+        self.name = name
+        self.weight = weight
+        self.value = value
+        self.description = description
+        self.color = color
+        self.selected = False
+
+
+def default_sins():
+    return [
+        Item("Wrath", 8, 15, "Burning rage that consumes reason", FLAME),
+        Item("Envy", 6, 12, "Bitter jealousy that poisons the heart", DARK_GREEN),
+        Item("Pride", 7, 14, "Arrogance that blinds the soul", PURPLE),
+        Item("Greed", 5, 10, "Insatiable hunger for more", GOLD),
+        Item("Lust", 4, 8, "Desires that corrupt the spirit", CRIMSON),
+        Item("Gluttony", 9, 16, "Excess that devours everything", ORANGE),
+        Item("Sloth", 3, 6, "Laziness that rots potential", GRAY),
+        Item("Despair", 6, 11, "Hopelessness that drowns the light", DARK_GRAY),
+        Item("Hatred", 10, 18, "Pure malice that destroys all", BLOOD_RED)
+    ]
+
+
+def default_virtues():
+    return [
+        Item("Compassion", 4, 12, "Empathy that heals wounds", GREEN),
+        Item("Humility", 3, 9, "Modesty that opens hearts", WHITE),
+        Item("Forgiveness", 5, 14, "Grace that breaks chains", SILVER),
+        Item("Patience", 2, 7, "Endurance through trials", BLUE),
+        Item("Courage", 6, 15, "Bravery in darkness", GOLD),
+        Item("Wisdom", 7, 16, "Knowledge that guides truth", PURPLE),
+        Item("Hope", 3, 10, "Light in the deepest darkness", YELLOW)
+    ]
+
+
+class SoulEngine(object):
+    """One soul's trial, from choosing a burden to the final judgment.
+
+    maze_seed: seed for every maze of this session (random if None), so
+    restarting with the same choices gives, and hits the cache for, the
+    same maze. The maze size, capacity, vision and solver default to the
+    module constants.
+    """
+    def __init__(self, sins=None, virtues=None, capacity=SOUL_CAPACITY,
+                 width=MAZE_WIDTH, height=MAZE_HEIGHT, maze_seed=None,
+                 algorithm=MAZE_ALGORITHM, pathfinder=PATHFINDER,
+                 vision_radius=VISION_RADIUS, vision_mode=VISION_MODE, maze_cache=None):
+        self.sins = sins if sins is not None else default_sins()
+        self.virtues = virtues if virtues is not None else default_virtues()
+        self.soul_capacity = capacity
+        self.width = width
+        self.height = height
+        self.pathfinder = pathfinder
+        self.vision_radius = vision_radius
+        self.vision_mode = vision_mode
+
+        # Best attainable moral balance for this catalog (knapsack oracle)
+        self.optimal_burden = optimal_burden(self.sins, self.virtues, self.soul_capacity)
+        self.frontier = moral_frontier(self.sins, self.virtues, self.soul_capacity)
+
+        # Live selection over sins followed by virtues (running totals)
+        sin_ids = set(id(sin) for sin in self.sins)
+        self.selection = SelectionState(
+            self.sins + self.virtues, self.soul_capacity,
+            value_of=lambda item: moral_value(item, id(item) in sin_ids),
+            group_of=lambda item: "sin" if id(item) in sin_ids else "virtue")
+
+        # Player choices and state
+        self.chosen_sins = []
+        self.chosen_virtues = []
+        self.moral_balance = 0
+        self.sin_weight = 0
+        self.virtue_weight = 0
+
+        # Maze variables
+        self.maze = None
+        self.maze_seed = maze_seed if maze_seed is not None else random.getrandbits(32)
+        self.maze_generator = MazeGenerator(width, height, seed=self.maze_seed, algorithm=algorithm)
+        self.maze_cache = maze_cache if maze_cache is not None else MazeCache()
+        self.start_pos = (1, 1)
+        self.player_pos = self.start_pos
+        self.goal_pos = (width - 2, height - 2)
+        self.player_path = []
+        self.shortest_path = []
+        self.visited_cells = VisibilityMask(width, height)  # For fog of war
+        self.last_revealed = []  # Cells uncovered by the latest reveal
+        self.maze_completed = False
+        self.goal_distances = None  # Cost-to-goal field for live feedback
+        self.junction_graph = None  # Start-to-goal JunctionGraph of the current maze, built on demand
+        self.path_cost_so_far = 0
+
+        # Final judgment
+        self.final_destination = ""
+        self.judgment_text = []
+        self.path_efficiency = 1.0
+
+    def calculate_current_weight(self):
+        """Current total weight of selected items (kept incrementally)"""
+        return self.selection.weight
+
+    def finalize_selections(self):
+        """Finalize the selected sins and virtues"""
+        self.chosen_sins = self.selection.selected_items("sin")
+        self.chosen_virtues = self.selection.selected_items("virtue")
+
+        self.sin_weight = self.selection.totals("sin")[1]
+        self.virtue_weight = self.selection.totals("virtue")[1]
+        self.moral_balance = self.selection.value
+
+    def generate_moral_maze(self):
+        """Generate maze (and its optimal path) based on moral choices, and place the player"""
+        key = maze_cache_key(self.maze_seed, self.width, self.height,
+                             self.chosen_sins, self.chosen_virtues,
+                             algorithm=self.maze_generator.algorithm)
+        cached = self.maze_cache.get(key)
+        self.junction_graph = None
+        if cached is not None:
+            self.maze, self.shortest_path = cached
+        else:
+            self.maze = self.maze_generator.generate_sinful_maze(self.chosen_sins, self.chosen_virtues)
+            self.shortest_path = self.dijkstra_pathfinding(self.start_pos, self.goal_pos)
+            self.maze_cache.put(key, self.maze, self.shortest_path)
+
+        # One reverse search from the goal makes every move's feedback O(1),
+        # and is repaired incrementally if the maze shifts later
+        self.goal_distances = DynamicDistanceField(self.maze, self.goal_pos)
+        self.player_pos = self.start_pos
+        self.player_path = [self.player_pos]
+        self.path_cost_so_far = 0
+        self.maze_completed = False
+
+        # Initialize fog of war
+        self.visited_cells = VisibilityMask(self.width, self.height)
+        self.reveal_around_player()
+
+    def reveal_around_player(self):
+        """Reveal cells around player position; returns the newly revealed cells"""
+        px, py = self.player_pos
+        if self.vision_mode == "shadowcast":
+            revealed = self.visited_cells.reveal_shadowcast(self.maze, px, py, self.vision_radius)
+        else:
+            revealed = self.visited_cells.reveal_disc(px, py, self.vision_radius)
+        self.last_revealed = revealed
+        return revealed
+
+    def shift_maze(self, changed_cells):
+        """Repair the optimal path after cells of the live maze were changed in place.
+
+        shortest_path is only re-derived when a changed cell lies on it or a
+        distance along it changed; otherwise it still costs the optimum.
+        """
+        field = self.goal_distances
+        if field is None:
+            return
+        changed_cells = [tuple(cell) for cell in changed_cells]
+        route = self.shortest_path or [self.start_pos]
+        before = [field.distance(x, y) for x, y in route]
+        field.update_cells(changed_cells)
+        self.junction_graph = None  # Corridors may have changed; rebuilt on the next junction query
+        on_route = set(route)
+        if (any(cell in on_route for cell in changed_cells) or
+                [field.distance(x, y) for x, y in route] != before):
+            self.shortest_path = field.path(self.start_pos)
+
+    def dijkstra_pathfinding(self, start, end):
+        """Cheapest path on the current maze by the PATHFINDER method.
+
+        The junction method keeps its graph (kept cells: start and goal) for
+        the life of the maze, so repeated queries between nodes only pay for
+        the small graph search; other endpoints get a graph of their own.
+        """
+        if self.pathfinder == "junction":
+            if self.junction_graph is None:
+                self.junction_graph = JunctionGraph(self.maze, keep=(self.start_pos, self.goal_pos))
+            if self.junction_graph.has_node(*start) and self.junction_graph.has_node(*end):
+                return self.junction_graph.path(start, end)
+        return find_path(self.maze, start, end, self.pathfinder)
+
+    def move(self, dx, dy):
+        """Step the player by (dx, dy); returns False if a wall or the finished maze is in the way.
+
+        Reaching the goal completes the maze and judges the soul.
+        """
+        if self.maze_completed:
+            return False
+        new_x, new_y = self.player_pos[0] + dx, self.player_pos[1] + dy
+        if not self.maze.is_open(new_x, new_y):
+            return False
+
+        self.player_pos = (new_x, new_y)
+        self.player_path.append(self.player_pos)
+        self.path_cost_so_far += self.maze.cost(new_x, new_y)
+        self.reveal_around_player()
+
+        # Check if goal reached
+        if self.player_pos == self.goal_pos:
+            self._complete()
+        return True
+
+    def follow(self, route):
+        """Walk a route of flat cell indices (y * width + x), each one step from the last.
+
+        The bulk form of move() for bots and simulations: the route is
+        checked, costed and revealed with array operations, and the walk
+        stops at the goal, judging the soul as move() does. Raises
+        ValueError if a step is not to an open neighbour. Returns the
+        number of steps taken.
+        """
+        import numpy as np
+        if self.maze_completed:
+            return 0
+        width = self.width
+        route = np.asarray(route, dtype=np.intp).reshape(-1)
+        goal = self.goal_pos[1] * width + self.goal_pos[0]
+        arrived = np.flatnonzero(route == goal)
+        if len(arrived):
+            route = route[:arrived[0] + 1]
+        if not len(route):
+            return 0
+
+        previous = np.concatenate(([self.player_pos[1] * width + self.player_pos[0]], route[:-1]))
+        step = route - previous
+        inside = (route >= 0) & (route < width * self.height)
+        adjacent = ((step == width) | (step == -width) |
+                    (((step == 1) | (step == -1)) & (route // width == previous // width)))
+        valid = inside & adjacent
+        valid[valid] = self.maze.cells.reshape(-1)[route[valid]] == 0
+        if not valid.all():
+            bad = int(np.argmin(valid))
+            raise ValueError("route step %d to index %d is not an open neighbour" % (bad, int(route[bad])))
+
+        ys, xs = np.divmod(route, width)
+        self.player_path.extend(zip(xs.tolist(), ys.tolist()))
+        self.player_pos = self.player_path[-1]
+        if self.maze.costs is None:
+            self.path_cost_so_far += len(route)
+        else:
+            self.path_cost_so_far += int(np.frombuffer(self.maze.costs, dtype=np.uint8)[route].sum())
+
+        if self.vision_mode == "shadowcast":
+            # Line of sight from a cell never changes, so each cell is cast from once
+            cast_ys, cast_xs = np.divmod(np.unique(route), width)
+            self.last_revealed = self.visited_cells.reveal_shadowcasts(self.maze, cast_xs, cast_ys,
+                                                                       self.vision_radius)
+        else:
+            self.last_revealed = self.visited_cells.reveal_discs(xs, ys, self.vision_radius)
+
+        if self.player_pos == self.goal_pos:
+            self._complete()
+        return len(route)
+
+    def _complete(self):
+        """Finish the maze and judge the soul"""
+        self.maze_completed = True
+        # Efficiency compares movement cost, which is the step count on unweighted mazes
+        user_cost = self.path_cost_so_far
+        optimal_cost = path_cost(self.maze, self.shortest_path) if self.shortest_path else user_cost
+        self.path_efficiency = float(user_cost) / optimal_cost if optimal_cost > 0 else 1.0
+        self.judge_soul(self.path_efficiency)
+
+    def live_efficiency(self):
+        """(wasted cost so far, projected efficiency %) from the goal distance field"""
+        field = self.goal_distances
+        start = self.start_pos
+        if field is None or field.distance(*start) is None:
+            return 0, 100
+        optimal = field.distance(*start)
+        remaining = field.distance(*self.player_pos) or 0
+        wasted = field.wasted(start, self.player_pos, self.path_cost_so_far)
+        projected = self.path_cost_so_far + remaining
+        return wasted, (100 * optimal // projected if projected > 0 else 100)
+
+    def judge_soul(self, path_efficiency):
+        """Enhanced judgment system"""
+        moral_score = self.moral_balance
+        efficiency_penalty = (path_efficiency - 1.0) * 10
+        final_score = moral_score - efficiency_penalty
+
+        if final_score >= 10 and path_efficiency < 1.5:
+            self.final_destination = "PURGATORY"
+            self.judgment_text = [
+                "Your virtues outweigh your sins...",
+                "Though imperfect, you showed wisdom in the maze...",
+                "Purgatory awaits - a chance for redemption...",
+                "Time will cleanse what remains of your burden."
+            ]
+        elif final_score >= 0 and path_efficiency < 2.0:
+            self.final_destination = "THE GRAY REALM"
+            self.judgment_text = [
+                "You walk the line between salvation and damnation...",
+                "Neither fully corrupted nor truly pure...",
+                "The Gray Realm claims you - eternal neutrality...",
+                "Forever suspended between light and darkness."
+            ]
+        elif final_score >= -10:
+            self.final_destination = "THE LOWER CIRCLES"
+            self.judgment_text = [
+                "Your sins have weight, but virtue remains...",
+                "The lower circles of suffering await...",
+                "Pain, but not eternal torment...",
+                "Hope flickers dimly in the distance."
+            ]
+        else:
+            self.final_destination = "THE ABYSS"
+            self.judgment_text = [
+                "Darkness consumes your soul...",
+                "Your choices have led to the deepest pit...",
+                "The Abyss opens its maw to swallow you...",
+                "Eternal suffering awaits the unrepentant."
+            ]
+
+    def reset(self):
+        """Forget the choices and the maze, ready for a new soul"""
+        self.chosen_sins = []
+        self.chosen_virtues = []
+        self.selection.clear()
+        self.player_pos = self.start_pos
+        self.player_path = []
+        self.maze_completed = False
+        self.visited_cells = VisibilityMask(self.width, self.height)
+        self.last_revealed = []
+        self.goal_distances = None
+        self.junction_graph = None
+        self.path_cost_so_far = 0
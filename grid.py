@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Compact maze grid storage (in memory and bit-packed on disk)
+Compatible with Python 2.7
+Dependencies: numpy
+"""
+
+import json
+import mmap
+import struct
+
+WALL = 1
+OPEN = 0
+
+MAZE_FILE_MAGIC = b"AOSG"
+MAZE_FILE_VERSION = 1
+# magic, version, width, height, seed, metadata length
+_FILE_HEADER = struct.Struct("<4sIIIQI")
+
+
+class MazeGrid(object):
+    """One byte per cell, row-major, shared between a flat buffer and numpy.
+
+    `buffer` is a flat bytearray indexed by y * width + x for fast scalar
+    access in hot loops; `cells` is a zero-copy (height, width) uint8 view of
+    the same memory for whole row/column/region operations. `grid[y][x]`
+    keeps working for older callers written against lists of lists.
+
+    An optional cost layer (one byte per cell, the cost of stepping onto it)
+    is allocated the first time a cell gets a cost other than 1; until then
+    `costs` is None and every move costs 1.
+    """
+    def __init__(self, width, height, fill=WALL, buffer=None, costs=None):
+        import numpy as np
+        self.width = width
+        self.height = height
+        if buffer is None:
+            buffer = bytearray([fill]) * (width * height)
+        self.buffer = buffer
+        self.cells = np.frombuffer(buffer, dtype=np.uint8).reshape(height, width)
+        self.costs = costs
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build a grid from a list of lists of 0/1"""
+        import numpy as np
+        height, width = len(rows), len(rows[0])
+        grid = cls(width, height)
+        grid.cells[:, :] = np.asarray(rows, dtype=np.uint8)
+        return grid
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        # Row view, so grid[y][x] reads and writes through to the buffer
+        return self.cells[y]
+
+    def __eq__(self, other):
+        if isinstance(other, MazeGrid):
+            return ((self.width, self.height) == (other.width, other.height) and
+                    self.buffer == other.buffer and self.costs == other.costs)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    @property
+    def nbytes(self):
+        return len(self.buffer)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.buffer[y * self.width + x] == OPEN
+
+    def fill(self, value=WALL):
+        self.cells.fill(value)
+
+    def carve(self, x, y):
+        self.buffer[y * self.width + x] = OPEN
+
+    def carve_row(self, y, x_start, x_end):
+        """Open cells x_start..x_end (inclusive, either order) on row y"""
+        if x_start > x_end:
+            x_start, x_end = x_end, x_start
+        self.cells[y, x_start:x_end + 1] = OPEN
+
+    def carve_column(self, x, y_start, y_end):
+        """Open cells y_start..y_end (inclusive, either order) in column x"""
+        if y_start > y_end:
+            y_start, y_end = y_end, y_start
+        self.cells[y_start:y_end + 1, x] = OPEN
+
+    def cost_cells(self):
+        """(height, width) uint8 view of the cost layer, allocating it if needed"""
+        import numpy as np
+        if self.costs is None:
+            self.costs = bytearray([1]) * (self.width * self.height)
+        return np.frombuffer(self.costs, dtype=np.uint8).reshape(self.height, self.width)
+
+    def cost(self, x, y):
+        return 1 if self.costs is None else self.costs[y * self.width + x]
+
+    def set_cost(self, x, y, cost):
+        if self.costs is None:
+            if cost == 1:
+                return
+            self.cost_cells()
+        self.costs[y * self.width + x] = cost
+
+    def copy(self):
+        costs = bytearray(self.costs) if self.costs is not None else None
+        return MazeGrid(self.width, self.height, buffer=bytearray(self.buffer), costs=costs)
+
+    def to_rows(self):
+        """Plain list of lists, for callers that need the legacy layout"""
+        return self.cells.tolist()
+
+
+def _packed_row_bytes(width):
+    return (width + 7) // 8
+
+
+def write_maze_file(path, width, height, rows, seed=0, metadata=None):
+    """Stream rows (one byte per cell) into a bit-packed maze file.
+
+    Layout: fixed header, JSON metadata (e.g. the moral choices), padding to
+    8 bytes, then height rows of ceil(width / 8) bytes with 1 bits for walls.
+    Rows are packed and written one at a time, so only O(width) memory is
+    needed whatever the maze size.
+    """
+    import numpy as np
+    meta = json.dumps(metadata or {}, sort_keys=True).encode("utf-8")
+    header_size = _FILE_HEADER.size + len(meta)
+    padding = b"\0" * (-header_size % 8)
+    written = 0
+    with open(path, "wb") as handle:
+        handle.write(_FILE_HEADER.pack(MAZE_FILE_MAGIC, MAZE_FILE_VERSION,
+                                       width, height, seed or 0, len(meta)))
+        handle.write(meta)
+        handle.write(padding)
+        for row in rows:
+            if written == height:
+                raise ValueError("more than %d rows supplied for maze file" % height)
+            handle.write(np.packbits(np.frombuffer(bytes(row), dtype=np.uint8)[:width]).tobytes())
+            written += 1
+    if written != height:
+        raise ValueError("expected %d rows for maze file, got %d" % (height, written))
+
+
+def save_maze_file(path, grid, seed=0, metadata=None):
+    """Write an in-memory MazeGrid in the bit-packed file format"""
+    width = grid.width
+    rows = (grid.buffer[y * width:(y + 1) * width] for y in range(grid.height))
+    write_maze_file(path, width, grid.height, rows, seed, metadata)
+
+
+class PackedCells(object):
+    """Flat y * width + x indexing over a bit-packed grid, decoded lazily"""
+    def __init__(self, data, offset, width, row_bytes):
+        self._data = data
+        self._offset = offset
+        self._width = width
+        self._row_bytes = row_bytes
+
+    def __getitem__(self, index):
+        y, x = divmod(index, self._width)
+        return self._data[self._offset + y * self._row_bytes + (x >> 3)] >> (7 - (x & 7)) & 1
+
+
+class PackedMazeGrid(object):
+    """Maze grid read from (and optionally written through) a mapped file.
+
+    Offers the same cell API as MazeGrid (buffer indexing, is_open, carve,
+    carve_row/carve_column, grid[y][x] reads) but pages the bit-packed rows
+    in from disk on demand, so it can be far larger than memory. Rows
+    returned by grid[y] are decoded copies; write through the carve methods.
+    """
+    def __init__(self, path, writable=False):
+        import numpy as np
+        self.path = path
+        self._file = open(path, "r+b" if writable else "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0,
+                              access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, version, width, height, seed, meta_length = _FILE_HEADER.unpack_from(self._map, 0)
+        if magic != MAZE_FILE_MAGIC or version != MAZE_FILE_VERSION:
+            self.close()
+            raise ValueError("%s is not a version %d maze file" % (path, MAZE_FILE_VERSION))
+        meta_start = _FILE_HEADER.size
+        meta = self._map[meta_start:meta_start + meta_length]
+        data_offset = meta_start + meta_length
+        data_offset += -data_offset % 8
+
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.metadata = json.loads(meta.decode("utf-8"))
+        self.row_bytes = _packed_row_bytes(width)
+        self.packed = np.frombuffer(self._map, dtype=np.uint8, count=height * self.row_bytes,
+                                    offset=data_offset).reshape(height, self.row_bytes)
+        self.buffer = PackedCells(self._map, data_offset, width, self.row_bytes)
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        return self.row(y)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def nbytes(self):
+        return self.height * self.row_bytes
+
+    def row(self, y):
+        """Decoded copy of one row, one byte per cell"""
+        import numpy as np
+        return np.unpackbits(self.packed[y])[:self.width]
+
+    costs = None  # Mapped files carry no cost layer; every move costs 1
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_open(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height and self.buffer[y * self.width + x] == OPEN
+
+    def cost(self, x, y):
+        return 1
+
+    def set_cost(self, x, y, cost):
+        pass
+
+    def carve(self, x, y):
+        self.packed[y, x >> 3] &= ~(0x80 >> (x & 7)) & 0xFF
+
+    def carve_row(self, y, x_start, x_end):
+        import numpy as np
+        if x_start > x_end:
+            x_start, x_end = x_end, x_start
+        row = self.row(y)
+        row[x_start:x_end + 1] = OPEN
+        self.packed[y] = np.packbits(row)
+
+    def carve_column(self, x, y_start, y_end):
+        if y_start > y_end:
+            y_start, y_end = y_end, y_start
+        self.packed[y_start:y_end + 1, x >> 3] &= ~(0x80 >> (x & 7)) & 0xFF
+
+    def to_grid(self):
+        """Load the whole maze into an in-memory MazeGrid"""
+        import numpy as np
+        grid = MazeGrid(self.width, self.height)
+        grid.cells[:, :] = np.unpackbits(self.packed, axis=1)[:, :self.width]
+        return grid
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        # numpy views pin the mapping, drop them before closing it
+        self.packed = None
+        self.buffer = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,594 @@
+# -*- coding: utf-8 -*-
+"""
+Knapsack solvers for the soul capacity
+Compatible with Python 2.7
+Dependencies: numpy (batch solver only)
+"""
+
+import bisect
+
+# Auto backend selection thresholds (see benchmarks/knapsack_backends.py)
+DP_MAX_CELLS = 4000000      # n * W up to here solves in well under a second
+MITM_MAX_ITEMS = 40         # 2^(n/2) subsets per half stays tractable up to here
+MITM_PREFERRED_ITEMS = 20   # guaranteed 2^10 work per half, no bad cases
+
+
+class SearchBudgetExceeded(RuntimeError):
+    """Raised when branch and bound explores more nodes than allowed"""
+
+
+class KnapsackResult(object):
+    """Outcome of a knapsack solve: best value, its weight and the chosen items"""
+    def __init__(self, value, weight, chosen):
+        self.value = value
+        self.weight = weight
+        self.chosen = chosen
+
+    def __repr__(self):
+        return "KnapsackResult(value=%r, weight=%r, chosen=%r)" % (
+            self.value, self.weight, [getattr(item, 'name', item) for item in self.chosen])
+
+
+def _rolling_best(weights, values, capacity):
+    """Best value for every capacity 0..W using a single O(W) row"""
+    best = [0] * (capacity + 1)
+    for weight, value in zip(weights, values):
+        if weight > capacity or value <= 0:
+            continue
+        if weight == 0:
+            best = [b + value for b in best]
+            continue
+        # Right-hand side is built from the previous row before assignment,
+        # which keeps this a 0/1 (not unbounded) update.
+        best[weight:] = [max(keep, take + value)
+                         for keep, take in zip(best[weight:], best[:capacity + 1 - weight])]
+    return best
+
+
+class _ItemSolver(object):
+    """Shared item bookkeeping for the knapsack backends"""
+    def __init__(self, items, capacity, value_of=None):
+        self.items = list(items)
+        self.capacity = capacity
+        self.value_of = value_of or (lambda item: item.value)
+        self.weights = [item.weight for item in self.items]
+        self.values = [self.value_of(item) for item in self.items]
+
+    def _candidates(self):
+        """Indices that can ever belong to an optimal set"""
+        return [i for i in range(len(self.items))
+                if 0 <= self.weights[i] <= self.capacity and self.values[i] > 0]
+
+    def _result(self, indices):
+        indices = sorted(indices)
+        chosen = [self.items[i] for i in indices]
+        value = sum(self.values[i] for i in indices)
+        weight = sum(self.weights[i] for i in indices)
+        return KnapsackResult(value, weight, chosen)
+
+
+class KnapsackSolver(_ItemSolver):
+    """Exact 0/1 knapsack over items exposing integer weights.
+
+    The full table mode stores one decision row per item (O(n*W) bytes) and
+    walks it back to recover the chosen set. The rolling mode keeps only
+    O(W) values and recovers the set by splitting the items in half and
+    recursing on the best capacity split (Hirschberg style).
+    """
+    def __init__(self, items, capacity, value_of=None):
+        _ItemSolver.__init__(self, items, int(capacity), value_of)
+        for item, weight in zip(self.items, self.weights):
+            if weight < 0 or int(weight) != weight:
+                raise ValueError("DP solver needs non-negative integer weights, got %r for %r"
+                                 % (weight, getattr(item, 'name', item)))
+        self.weights = [int(weight) for weight in self.weights]
+
+    def solve(self, rolling=False):
+        """Solve and return a KnapsackResult"""
+        if self.capacity < 0:
+            return KnapsackResult(0, 0, [])
+        if rolling:
+            return self._result(self._solve_rolling(list(range(len(self.items))), self.capacity))
+        return self._result(self._solve_table())
+
+    def best_value(self):
+        """Optimal value only, in O(W) memory"""
+        if self.capacity < 0:
+            return 0
+        return _rolling_best(self.weights, self.values, self.capacity)[self.capacity]
+
+    def _solve_table(self):
+        """Classic DP with a per-item decision table for reconstruction"""
+        capacity = self.capacity
+        best = [0] * (capacity + 1)
+        decisions = []
+        for weight, value in zip(self.weights, self.values):
+            if weight > capacity or value <= 0:
+                decisions.append(None)
+                continue
+            if weight == 0:
+                best = [b + value for b in best]
+                decisions.append(True)
+                continue
+            updated = best[:weight] + [max(keep, take + value)
+                                       for keep, take in zip(best[weight:], best[:capacity + 1 - weight])]
+            decisions.append(bytearray(1 if new > old else 0 for new, old in zip(updated, best)))
+            best = updated
+
+        chosen = []
+        remaining = capacity
+        for i in range(len(decisions) - 1, -1, -1):
+            row = decisions[i]
+            if row is None:
+                continue
+            if row is True or row[remaining]:
+                chosen.append(i)
+                remaining -= self.weights[i]
+        return chosen
+
+    def _solve_rolling(self, indices, capacity):
+        """Recover the chosen set in O(W) memory by divide and conquer"""
+        indices = [i for i in indices
+                   if self.weights[i] <= capacity and self.values[i] > 0]
+        if not indices:
+            return []
+        if len(indices) == 1:
+            return indices
+
+        mid = len(indices) // 2
+        left, right = indices[:mid], indices[mid:]
+        left_best = _rolling_best([self.weights[i] for i in left],
+                                  [self.values[i] for i in left], capacity)
+        right_best = _rolling_best([self.weights[i] for i in right],
+                                   [self.values[i] for i in right], capacity)
+
+        split = max(range(capacity + 1),
+                    key=lambda c: left_best[c] + right_best[capacity - c])
+
+        return (self._solve_rolling(left, split) +
+                self._solve_rolling(right, capacity - split))
+
+
+class BranchAndBoundSolver(_ItemSolver):
+    """Depth-first branch and bound with a fractional-relaxation upper bound.
+
+    Works for arbitrarily large integer or float weights. Items are visited
+    in value density order; prefix sums over that order make each bound an
+    O(log n) bisect instead of a greedy rescan.
+    """
+    def solve(self, max_nodes=None):
+        order = sorted(self._candidates(),
+                       key=lambda i: -self.values[i] / float(self.weights[i]) if self.weights[i] else float('-inf'))
+        weights = [self.weights[i] for i in order]
+        values = [self.values[i] for i in order]
+        n = len(order)
+        capacity = self.capacity
+
+        prefix_weight = [0]
+        prefix_value = [0]
+        for weight, value in zip(weights, values):
+            prefix_weight.append(prefix_weight[-1] + weight)
+            prefix_value.append(prefix_value[-1] + value)
+
+        def upper_bound(i, room):
+            # Whole items i..k-1 fit, item k (if any) is taken fractionally
+            k = bisect.bisect_right(prefix_weight, prefix_weight[i] + room, i) - 1
+            bound = prefix_value[k] - prefix_value[i]
+            if k < n:
+                bound += (room - (prefix_weight[k] - prefix_weight[i])) * values[k] / float(weights[k])
+            return bound
+
+        best_value = 0
+        best_taken = None
+        # Nodes are (next item, weight, value, taken) with taken a cons list
+        stack = [(0, 0, 0, None)]
+        nodes = 0
+        while stack:
+            nodes += 1
+            if max_nodes is not None and nodes > max_nodes:
+                raise SearchBudgetExceeded("branch and bound exceeded %d nodes" % max_nodes)
+            i, weight, value, taken = stack.pop()
+            if value > best_value:
+                best_value, best_taken = value, taken
+            if i == n or value + upper_bound(i, capacity - weight) <= best_value:
+                continue
+            stack.append((i + 1, weight, value, taken))
+            if weight + weights[i] <= capacity:
+                stack.append((i + 1, weight + weights[i], value + values[i], (i, taken)))
+
+        chosen = []
+        while best_taken is not None:
+            chosen.append(order[best_taken[0]])
+            best_taken = best_taken[1]
+        return self._result(chosen)
+
+
+class MeetInTheMiddleSolver(_ItemSolver):
+    """Exact solve by enumerating both halves of the catalog (n up to ~40).
+
+    The right half's subsets are sorted by weight and reduced to a strictly
+    improving staircase, so each left subset is matched with one bisect.
+    """
+    def solve(self):
+        candidates = self._candidates()
+        if len(candidates) > MITM_MAX_ITEMS:
+            raise ValueError("meet-in-the-middle is limited to %d items, got %d"
+                             % (MITM_MAX_ITEMS, len(candidates)))
+        mid = len(candidates) // 2
+        left = self._subsets(candidates[:mid])
+        right = self._subsets(candidates[mid:])
+
+        right.sort()
+        stair_weights, stair_values, stair_masks = [], [], []
+        for weight, value, mask in right:
+            if not stair_values or value > stair_values[-1]:
+                stair_weights.append(weight)
+                stair_values.append(value)
+                stair_masks.append(mask)
+
+        best = (0, 0, 0)
+        for weight, value, mask in left:
+            k = bisect.bisect_right(stair_weights, self.capacity - weight) - 1
+            if k >= 0 and value + stair_values[k] > best[0]:
+                best = (value + stair_values[k], mask, stair_masks[k])
+
+        _, left_mask, right_mask = best
+        chosen = [i for bit, i in enumerate(candidates[:mid]) if left_mask >> bit & 1]
+        chosen += [i for bit, i in enumerate(candidates[mid:]) if right_mask >> bit & 1]
+        return self._result(chosen)
+
+    def _subsets(self, indices):
+        """(weight, value, bitmask) for every subset that fits the capacity"""
+        subsets = [(0, 0, 0)]
+        for bit, i in enumerate(indices):
+            weight, value, flag = self.weights[i], self.values[i], 1 << bit
+            subsets += [(w + weight, v + value, m | flag) for w, v, m in subsets
+                        if w + weight <= self.capacity]
+        return subsets
+
+
+def choose_backend(items, capacity):
+    """Pick the cheapest exact backend for a catalog and capacity.
+
+    DP and small meet-in-the-middle have predictable worst cases, so they
+    win whenever they are cheap; past that branch and bound is usually
+    orders of magnitude faster, though it can degrade on strongly
+    correlated catalogs.
+    """
+    weights = [item.weight for item in items if 0 <= item.weight <= capacity]
+    integral = all(int(weight) == weight for weight in weights) and int(capacity) == capacity
+    cells = len(weights) * (int(capacity) + 1) if integral else None
+
+    if cells is not None and cells <= DP_MAX_CELLS:
+        return "dp"
+    if len(weights) <= MITM_PREFERRED_ITEMS:
+        return "mitm"
+    return "bnb"
+
+
+def solve_knapsack(items, capacity, value_of=None, backend="auto"):
+    """Solve 0/1 knapsack with a named backend: dp, dp-rolling, bnb, mitm or auto"""
+    if backend == "auto":
+        backend = choose_backend(items, capacity)
+    if backend == "dp":
+        return KnapsackSolver(items, capacity, value_of).solve()
+    if backend == "dp-rolling":
+        return KnapsackSolver(items, capacity, value_of).solve(rolling=True)
+    if backend == "bnb":
+        return BranchAndBoundSolver(items, capacity, value_of).solve()
+    if backend == "mitm":
+        return MeetInTheMiddleSolver(items, capacity, value_of).solve()
+    raise ValueError("Unknown knapsack backend: %r" % (backend,))
+
+
+def moral_value(item, is_sin):
+    """Contribution of an item to the moral balance (sins weigh against)"""
+    return -item.value if is_sin else item.value
+
+
+def optimal_burden(sins, virtues, capacity, backend="auto"):
+    """Best achievable moral balance over sins + virtues within the soul capacity"""
+    sin_set = set(id(sin) for sin in sins)
+    return solve_knapsack(list(sins) + list(virtues), capacity,
+                          value_of=lambda item: moral_value(item, id(item) in sin_set),
+                          backend=backend)
+
+
+class BatchKnapsackResult(object):
+    """Optimal value per catalog of a batch; weights and chosen masks when reconstructed"""
+    def __init__(self, values, weights, chosen=None):
+        self.values = values
+        self.weights = weights
+        self.chosen = chosen
+
+    def __len__(self):
+        return len(self.values)
+
+    def chosen_indices(self, row):
+        """Item indices of the optimal selection for one catalog"""
+        if self.chosen is None:
+            raise ValueError("batch was solved without reconstruct=True")
+        import numpy as np
+        return np.flatnonzero(self.chosen[row]).tolist()
+
+
+def stack_catalogs(catalogs, value_of=None):
+    """(weights, values) arrays of shape (catalogs, most items) from lists of items.
+
+    Shorter catalogs are padded with weightless, worthless items, which the
+    solver never takes, so row b column i is item i of catalog b.
+    """
+    import numpy as np  # Only the batch solver needs numpy
+    value_of = value_of or (lambda item: item.value)
+    catalogs = [list(items) for items in catalogs]
+    width = max([len(items) for items in catalogs] or [0])
+    padding = [[0] * (width - len(items)) for items in catalogs]
+    weights = np.array([[item.weight for item in items] + pad for items, pad in zip(catalogs, padding)],
+                       dtype=np.int64).reshape(len(catalogs), width)
+    values = np.array([[value_of(item) for item in items] + pad for items, pad in zip(catalogs, padding)]
+                      ).reshape(len(catalogs), width)
+    return weights, values
+
+
+def batch_knapsack(weights, values, capacities, reconstruct=False):
+    """Exact 0/1 knapsack for many catalogs and capacities in one pass.
+
+    weights and values are (B, n) arrays, one catalog per row (see
+    stack_catalogs), and capacities a length-B vector or a scalar. The DP
+    rows of all catalogs are kept as one (B, W + 1) array, W being the
+    largest capacity, and each item updates every row at once, so the work
+    is n whole-array steps instead of B Python solves. With reconstruct the
+    per-item decisions are kept (n * B * (W + 1) bytes) and walked back to
+    a (B, n) boolean mask of the chosen items. Ties keep the lighter set,
+    as KnapsackSolver does.
+    """
+    import numpy as np  # Only the batch solver needs numpy
+    weights = np.atleast_2d(np.asarray(weights))
+    values = np.atleast_2d(np.asarray(values))
+    if weights.shape != values.shape:
+        raise ValueError("weights %r and values %r differ in shape" % (weights.shape, values.shape))
+    batch, n = weights.shape
+    capacities = np.broadcast_to(np.asarray(capacities), (batch,))
+    for array in (weights, capacities):
+        if not np.issubdtype(array.dtype, np.integer) and np.any(array != np.floor(array)):
+            raise ValueError("batch solver needs integer weights and capacities")
+    weights = weights.astype(np.int64)
+    capacities = capacities.astype(np.int64)
+    if weights.size and weights.min() < 0:
+        raise ValueError("batch solver needs non-negative weights")
+
+    top = int(max(capacities.max(), 0)) if batch else 0
+    best = np.zeros((batch, top + 1), dtype=np.result_type(values.dtype, np.int64))
+    rows = np.arange(batch)[:, None]
+    columns = np.arange(top + 1)
+    decisions = np.zeros((n, batch, top + 1), dtype=bool) if reconstruct else None
+    for i in range(n):
+        item_weights = weights[:, i:i + 1]
+        item_values = values[:, i:i + 1]
+        source = columns - item_weights
+        take = best[rows, np.maximum(source, 0)] + item_values
+        improves = (source >= 0) & (item_values > 0) & (take > best)
+        np.copyto(best, take, where=improves)
+        if reconstruct:
+            decisions[i] = improves
+
+    fits = capacities >= 0
+    index = np.maximum(capacities, 0)
+    optimum = np.where(fits, best[np.arange(batch), index], 0)
+    chosen = None
+    if reconstruct:
+        chosen = np.zeros((batch, n), dtype=bool)
+        remaining = index.copy()
+        every = np.arange(batch)
+        for i in range(n - 1, -1, -1):
+            took = decisions[i, every, remaining] & fits
+            chosen[:, i] = took
+            remaining -= np.where(took, weights[:, i], 0)
+        total_weight = (chosen * weights).sum(axis=1)
+    else:
+        total_weight = None
+    return BatchKnapsackResult(optimum, total_weight, chosen)
+
+
+def batch_optimal_burden(catalogs, capacities, reconstruct=False):
+    """Best moral balance for many (sins, virtues) catalogs at once.
+
+    catalogs is a sequence of (sins, virtues) pairs, e.g. variants of
+    SoulEngine.sins and .virtues; columns are the sins then the virtues.
+    """
+    items, value_of = [], {}
+    for sins, virtues in catalogs:
+        for sin in sins:
+            value_of[id(sin)] = moral_value(sin, True)
+        for virtue in virtues:
+            value_of[id(virtue)] = moral_value(virtue, False)
+        items.append(list(sins) + list(virtues))
+    weights, values = stack_catalogs(items, value_of=lambda item: value_of[id(item)])
+    return batch_knapsack(weights, values, capacities, reconstruct)
+
+
+class SelectionState(object):
+    """Live knapsack selection with O(1) running totals on toggle.
+
+    Items are addressed by their index in the catalog. Alongside the totals
+    it keeps bitmasks of the selected items and of every item that still
+    fits the remaining capacity, so callers can gray out options without
+    rescanning the catalog. Optional groups (e.g. sins vs virtues) get their
+    own running count/weight/value.
+    """
+    def __init__(self, items, capacity, value_of=None, group_of=None):
+        self.items = list(items)
+        self.capacity = capacity
+        self.value_of = value_of or (lambda item: item.value)
+        self.group_of = group_of or (lambda item: None)
+
+        self.weights = [item.weight for item in self.items]
+        self.values = [self.value_of(item) for item in self.items]
+        self.groups = [self.group_of(item) for item in self.items]
+
+        # fit_masks[k] has a bit for each of the k lightest items, so the
+        # items fitting a remaining capacity r are fit_masks[bisect(r)].
+        order = sorted(range(len(self.items)), key=lambda i: self.weights[i])
+        self._sorted_weights = [self.weights[i] for i in order]
+        self._fit_masks = [0]
+        for i in order:
+            self._fit_masks.append(self._fit_masks[-1] | (1 << i))
+
+        self.clear()
+
+    def clear(self):
+        """Deselect everything"""
+        self.selected_mask = 0
+        self.weight = 0
+        self.value = 0
+        self._group_totals = {}
+        for group in self.groups:
+            self._group_totals[group] = [0, 0, 0]
+        for item in self.items:
+            item.selected = False
+        self._refresh_addable()
+
+    def _refresh_addable(self):
+        remaining = self.capacity - self.weight
+        count = bisect.bisect_right(self._sorted_weights, remaining) if remaining >= 0 else 0
+        self.addable_mask = self._fit_masks[count] & ~self.selected_mask
+
+    @property
+    def remaining(self):
+        return self.capacity - self.weight
+
+    def is_selected(self, index):
+        return bool(self.selected_mask >> index & 1)
+
+    def can_add(self, index):
+        return bool(self.addable_mask >> index & 1)
+
+    def toggle(self, index):
+        """Select or deselect an item; returns False if it would not fit"""
+        bit = 1 << index
+        sign = -1 if self.selected_mask & bit else 1
+        if sign > 0 and not self.addable_mask & bit:
+            return False
+
+        self.selected_mask ^= bit
+        self.weight += sign * self.weights[index]
+        self.value += sign * self.values[index]
+        totals = self._group_totals[self.groups[index]]
+        totals[0] += sign
+        totals[1] += sign * self.weights[index]
+        totals[2] += sign * self.values[index]
+        self.items[index].selected = sign > 0
+        self._refresh_addable()
+        return True
+
+    def totals(self, group=None):
+        """(count, weight, value) of the selected items in a group, or of the whole selection"""
+        if group is None:
+            return bin(self.selected_mask).count("1"), self.weight, self.value
+        return tuple(self._group_totals.get(group, (0, 0, 0)))
+
+    def selected_items(self, group=None):
+        return [item for i, item in enumerate(self.items)
+                if self.selected_mask >> i & 1 and (group is None or self.groups[i] == group)]
+
+
+class ParetoFrontier(object):
+    """Non-dominated (weight, value) points over every subset of a catalog.
+
+    Points are sorted by weight with strictly increasing value; each keeps a
+    cons list of item indices so the subset behind it can be recovered.
+    """
+    def __init__(self, items, weights, values, links):
+        self.items = items
+        self.weights = weights
+        self.values = values
+        self._links = links
+
+    def __len__(self):
+        return len(self.weights)
+
+    def points(self):
+        return list(zip(self.weights, self.values))
+
+    def best_within(self, weight):
+        """Index of the best point not heavier than weight (-1 if none)"""
+        return bisect.bisect_right(self.weights, weight) - 1
+
+    def best_value(self, weight):
+        index = self.best_within(weight)
+        return self.values[index] if index >= 0 else None
+
+    def gap(self, weight, value):
+        """How much value a selection of this weight leaves on the table"""
+        best = self.best_value(weight)
+        return 0 if best is None else max(0, best - value)
+
+    def chosen(self, index):
+        """Items making up the frontier point at index"""
+        chosen = []
+        link = self._links[index]
+        while link is not None:
+            chosen.append(self.items[link[0]])
+            link = link[1]
+        chosen.reverse()
+        return chosen
+
+
+def _merge_frontier(weights, values, links, item_weight, item_value, index, capacity):
+    """Merge a frontier with its copy shifted by one item, dropping dominated points"""
+    merged_weights, merged_values, merged_links = [], [], []
+    n = len(weights)
+    i = j = 0
+    while i < n or j < n:
+        if j < n:
+            shifted_weight = weights[j] + item_weight
+            if capacity is not None and shifted_weight > capacity:
+                j = n
+                continue
+        if j >= n or (i < n and (weights[i], -values[i]) <= (shifted_weight, -(values[j] + item_value))):
+            weight, value, link = weights[i], values[i], links[i]
+            i += 1
+        else:
+            weight, value, link = shifted_weight, values[j] + item_value, (index, links[j])
+            j += 1
+        if merged_values and value <= merged_values[-1]:
+            continue
+        if merged_weights and weight == merged_weights[-1]:
+            merged_values[-1], merged_links[-1] = value, link
+            continue
+        merged_weights.append(weight)
+        merged_values.append(value)
+        merged_links.append(link)
+    return merged_weights, merged_values, merged_links
+
+
+def build_frontier(items, value_of=None, capacity=None):
+    """Pareto frontier by sorted-merge dominance pruning (Nemhauser-Ullmann)"""
+    value_of = value_of or (lambda item: item.value)
+    items = list(items)
+    weights, values, links = [0], [0], [None]
+    for index, item in enumerate(items):
+        weights, values, links = _merge_frontier(weights, values, links,
+                                                 item.weight, value_of(item), index, capacity)
+    return ParetoFrontier(items, weights, values, links)
+
+
+_FRONTIER_CACHE = {}
+FRONTIER_CACHE_SIZE = 32
+
+
+def moral_frontier(sins, virtues, capacity=None):
+    """Cached (weight, moral balance) frontier for a sin/virtue catalog"""
+    key = (tuple((sin.name, sin.weight, sin.value) for sin in sins),
+           tuple((virtue.name, virtue.weight, virtue.value) for virtue in virtues),
+           capacity)
+    frontier = _FRONTIER_CACHE.get(key)
+    if frontier is None:
+        if len(_FRONTIER_CACHE) >= FRONTIER_CACHE_SIZE:
+            _FRONTIER_CACHE.pop(next(iter(_FRONTIER_CACHE)))
+        sin_set = set(id(sin) for sin in sins)
+        frontier = build_frontier(list(sins) + list(virtues),
+                                  value_of=lambda item: moral_value(item, id(item) in sin_set),
+                                  capacity=capacity)
+        _FRONTIER_CACHE[key] = frontier
+    return frontier
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Base maze carving algorithms, selectable by name
+Compatible with Python 2.7
+Dependencies: none
+
+Every algorithm carves a perfect maze into a MazeGrid whose cells sit on odd
+(x, y) coordinates, with the walls between them on the even ones. The sin and
+virtue post-processing in MazeGenerator runs the same way on all of them.
+"""
+
+from collections import OrderedDict
+
+MAZE_ALGORITHMS = OrderedDict()
+# Algorithms that can emit rows in order with O(width) state: name -> rows(width, height, rng)
+STREAMING_ALGORITHMS = OrderedDict()
+
+
+def register_algorithm(name):
+    """Decorator adding a carve(grid, rng) function to the registry"""
+    def decorator(function):
+        MAZE_ALGORITHMS[name] = function
+        return function
+    return decorator
+
+
+def get_algorithm(name):
+    try:
+        return MAZE_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError("Unknown maze algorithm %r (choose from %s)"
+                         % (name, ", ".join(MAZE_ALGORITHMS)))
+
+
+def get_streaming_algorithm(name):
+    try:
+        return STREAMING_ALGORITHMS[name]
+    except KeyError:
+        raise ValueError("Maze algorithm %r cannot stream rows (choose from %s)"
+                         % (name, ", ".join(STREAMING_ALGORITHMS)))
+
+
+def _cell_coords(width, height):
+    return list(range(1, width - 1, 2)), list(range(1, height - 1, 2))
+
+
+@register_algorithm("backtracker")
+def carve_backtracker(grid, rng):
+    """Iterative recursive backtracker: long winding corridors"""
+    cells = grid.buffer
+    width, height = grid.width, grid.height
+
+    stack = [(1, 1)]
+    cells[1 * width + 1] = 0
+    directions = [(2, 0), (0, 2), (-2, 0), (0, -2)]
+
+    while stack:
+        current_x, current_y = stack[-1]
+        neighbors = []
+
+        for dx, dy in directions:
+            nx, ny = current_x + dx, current_y + dy
+            if (0 < nx < width - 1 and 0 < ny < height - 1 and
+                    cells[ny * width + nx] == 1):
+                neighbors.append((nx, ny, dx, dy))
+
+        if neighbors:
+            nx, ny, dx, dy = rng.choice(neighbors)
+            wall_x = current_x + dx // 2
+            wall_y = current_y + dy // 2
+            cells[wall_y * width + wall_x] = 0
+            cells[ny * width + nx] = 0
+            stack.append((nx, ny))
+        else:
+            stack.pop()
+
+
+def eller_rows(width, height, rng):
+    """Yield the maze one full grid row (bytearray) at a time.
+
+    Eller's algorithm only remembers which set each cell of the current row
+    belongs to, so memory stays O(width) however tall the maze is.
+    """
+    columns = len(range(1, width - 1, 2))
+    cell_rows = len(range(1, height - 1, 2))
+    wall_row = bytearray([1]) * width
+
+    yield bytearray(wall_row)
+    emitted = 1
+    labels = [None] * columns
+    next_label = 0
+
+    for row_index in range(cell_rows):
+        last = row_index == cell_rows - 1
+
+        # Cells that were not joined from above start their own set
+        members = {}
+        for column in range(columns):
+            if labels[column] is None:
+                labels[column] = next_label
+                next_label += 1
+            members.setdefault(labels[column], []).append(column)
+
+        row = bytearray(wall_row)
+        for column in range(columns):
+            row[2 * column + 1] = 0
+
+        # Randomly join neighbours from different sets (all of them on the last row)
+        for column in range(columns - 1):
+            left, right = labels[column], labels[column + 1]
+            if left != right and (last or rng.random() < 0.5):
+                row[2 * column + 2] = 0
+                keep, absorb = (left, right) if len(members[left]) >= len(members[right]) else (right, left)
+                for moved in members.pop(absorb):
+                    labels[moved] = keep
+                    members[keep].append(moved)
+        yield row
+        emitted += 1
+
+        if last:
+            break
+
+        # Every set carries on downwards through at least one cell
+        below = bytearray(wall_row)
+        next_labels = [None] * columns
+        groups = OrderedDict()
+        for column in range(columns):
+            groups.setdefault(labels[column], []).append(column)
+        for label, group in groups.items():
+            down = [column for column in group if rng.random() < 0.5]
+            if not down:
+                down = [rng.choice(group)]
+            for column in down:
+                below[2 * column + 1] = 0
+                next_labels[column] = label
+        labels = next_labels
+        yield below
+        emitted += 1
+
+    while emitted < height:
+        yield bytearray(wall_row)
+        emitted += 1
+
+
+STREAMING_ALGORITHMS["eller"] = eller_rows
+
+
+@register_algorithm("eller")
+def carve_eller(grid, rng):
+    """Eller's algorithm, written row by row into the grid"""
+    width = grid.width
+    for y, row in enumerate(eller_rows(grid.width, grid.height, rng)):
+        grid.buffer[y * width:(y + 1) * width] = row
+
+
+@register_algorithm("kruskal")
+def carve_kruskal(grid, rng):
+    """Randomized Kruskal: shuffle all walls, open those joining two trees"""
+    cells = grid.buffer
+    width = grid.width
+    xs, ys = _cell_coords(grid.width, grid.height)
+    columns = len(xs)
+    if not xs or not ys:
+        return
+
+    parent = list(range(columns * len(ys)))
+
+    def find(node):
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+        while parent[node] != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    walls = []
+    for row, y in enumerate(ys):
+        for column, x in enumerate(xs):
+            cells[y * width + x] = 0
+            node = row * columns + column
+            if column + 1 < columns:
+                walls.append((node, node + 1, y * width + x + 1))
+            if row + 1 < len(ys):
+                walls.append((node, node + columns, (y + 1) * width + x))
+    rng.shuffle(walls)
+
+    for a, b, wall in walls:
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_a] = root_b
+            cells[wall] = 0
+
+
+@register_algorithm("prim")
+def carve_prim(grid, rng):
+    """Randomized Prim: grow from the start by opening random frontier walls"""
+    cells = grid.buffer
+    width, height = grid.width, grid.height
+    if width < 3 or height < 3:
+        return
+
+    def add_walls(x, y, frontier):
+        for dx, dy in ((2, 0), (-2, 0), (0, 2), (0, -2)):
+            nx, ny = x + dx, y + dy
+            if 0 < nx < width - 1 and 0 < ny < height - 1 and cells[ny * width + nx] == 1:
+                frontier.append((nx, ny, x + dx // 2, y + dy // 2))
+
+    cells[1 * width + 1] = 0
+    frontier = []
+    add_walls(1, 1, frontier)
+    while frontier:
+        # Swap-remove a random frontier entry in O(1)
+        index = rng.randrange(len(frontier))
+        frontier[index], frontier[-1] = frontier[-1], frontier[index]
+        x, y, wall_x, wall_y = frontier.pop()
+        if cells[y * width + x] == 0:
+            continue
+        cells[wall_y * width + wall_x] = 0
+        cells[y * width + x] = 0
+        add_walls(x, y, frontier)
+
+
+@register_algorithm("wilson")
+def carve_wilson(grid, rng):
+    """Wilson's algorithm: loop-erased random walks give an unbiased maze"""
+    cells = grid.buffer
+    width = grid.width
+    xs, ys = _cell_coords(grid.width, grid.height)
+    columns, rows = len(xs), len(ys)
+    if not columns or not rows:
+        return
+
+    in_tree = bytearray(columns * rows)
+    heading = [0] * (columns * rows)  # Last step taken out of each cell
+    steps = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+    root = rng.randrange(columns * rows)
+    in_tree[root] = 1
+    cells[ys[root // columns] * width + xs[root % columns]] = 0
+
+    for start in range(columns * rows):
+        if in_tree[start]:
+            continue
+        # Walk until hitting the tree; overwriting headings erases loops
+        node = start
+        while not in_tree[node]:
+            column, row = node % columns, node // columns
+            while True:
+                step = rng.randrange(4)
+                dx, dy = steps[step]
+                if 0 <= column + dx < columns and 0 <= row + dy < rows:
+                    break
+            heading[node] = step
+            node = (row + dy) * columns + column + dx
+
+        node = start
+        while not in_tree[node]:
+            in_tree[node] = 1
+            column, row = node % columns, node // columns
+            dx, dy = steps[heading[node]]
+            x, y = xs[column], ys[row]
+            cells[y * width + x] = 0
+            cells[(y + dy) * width + x + dx] = 0
+            node = (row + dy) * columns + column + dx
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache of generated mazes and their shortest paths
+Compatible with Python 2.7
+Dependencies: numpy
+"""
+
+import hashlib
+import os
+import struct
+from collections import OrderedDict
+
+from grid import MazeGrid
+
+CACHE_MAGIC = b"AOSM"
+CACHE_VERSION = 2
+# magic, version, width, height, path length, has cost layer
+_HEADER = struct.Struct("<4sIIIII")
+# os.replace swaps the file in atomically everywhere; Python 2 only has rename
+_replace = getattr(os, "replace", os.rename)
+
+
+def maze_cache_key(seed, width, height, chosen_sins, chosen_virtues, algorithm="backtracker"):
+    """Hex digest identifying a maze by seed, size, algorithm and moral choices"""
+    sins = sorted((sin.name, sin.weight) for sin in chosen_sins)
+    virtues = sorted((virtue.name, virtue.weight) for virtue in chosen_virtues)
+    text = repr((CACHE_VERSION, seed, width, height, algorithm, sins, virtues))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class MazeCache(object):
+    """In-memory LRU of (grid, shortest path) with an optional disk tier.
+
+    Memory holds at most max_entries mazes. When a directory is given every
+    entry is also written there as a small file (bit-packed grid, path and
+    cost layer if any),
+    and the directory is trimmed to max_disk_bytes by least recent use.
+    Grids are copied on the way in and out, so callers may mutate them.
+    """
+    def __init__(self, max_entries=16, directory=None, max_disk_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self.directory is not None and os.path.exists(self._path(key)))
+
+    def get(self, key):
+        """(grid, path) for a key, or None on a miss"""
+        entry = self._entries.pop(key, None)
+        if entry is None and self.directory is not None:
+            entry = self._load(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries[key] = entry  # Most recently used goes last
+        self._trim_memory()
+        self.hits += 1
+        grid, path = entry
+        return grid.copy(), list(path)
+
+    def put(self, key, grid, path):
+        self._entries.pop(key, None)
+        self._entries[key] = (grid.copy(), [tuple(pos) for pos in path])
+        self._trim_memory()
+        if self.directory is not None:
+            self._store(key, grid, path)
+            self._trim_disk()
+
+    def clear(self):
+        self._entries.clear()
+
+    def _trim_memory(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".maze")
+
+    def _store(self, key, grid, path):
+        import numpy as np
+        coords = np.asarray(path, dtype="<u4").reshape(-1)
+        target = self._path(key)
+        temp = target + ".tmp"
+        with open(temp, "wb") as handle:
+            handle.write(_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, grid.width, grid.height,
+                                      len(path), grid.costs is not None))
+            handle.write(np.packbits(grid.cells).tobytes())
+            handle.write(coords.tobytes())
+            if grid.costs is not None:
+                handle.write(bytes(grid.costs))
+        _replace(temp, target)
+
+    def _load(self, key):
+        import numpy as np
+        filename = self._path(key)
+        try:
+            with open(filename, "rb") as handle:
+                data = handle.read()
+        except (IOError, OSError):
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, width, height, path_length, has_costs = _HEADER.unpack_from(data)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION:
+            return None
+
+        packed_size = (width * height + 7) // 8
+        offset = _HEADER.size
+        if len(data) != offset + packed_size + path_length * 8 + (width * height if has_costs else 0):
+            return None  # Truncated or padded file
+        bits = np.frombuffer(data, dtype=np.uint8, count=packed_size, offset=offset)
+        grid = MazeGrid(width, height)
+        grid.cells[:, :] = np.unpackbits(bits)[:width * height].reshape(height, width)
+
+        coords = np.frombuffer(data, dtype="<u4", count=path_length * 2,
+                               offset=offset + packed_size).tolist()
+        path = list(zip(coords[0::2], coords[1::2]))
+        if has_costs:
+            costs_offset = offset + packed_size + path_length * 8
+            grid.costs = bytearray(data[costs_offset:costs_offset + width * height])
+
+        os.utime(filename, None)  # Mark as recently used for disk eviction
+        return grid, path
+
+    def _trim_disk(self):
+        files = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".maze"):
+                continue
+            filename = os.path.join(self.directory, name)
+            stat = os.stat(filename)
+            files.append((stat.st_mtime, stat.st_size, filename))
+            total += stat.st_size
+        files.sort()
+        for _, size, filename in files:
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(filename)
+            total -= size
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Maze generation shaped by the chosen sins and virtues
+Compatible with Python 2.7
+Dependencies: numpy
+"""
+
+import hashlib
+import random
+
+from grid import MazeGrid, PackedMazeGrid, write_maze_file
+from maze_algorithms import get_algorithm, get_streaming_algorithm
+
+# Movement costs written by sin effects (stepping onto a cell)
+TRAP_COST = 5       # Greed: treasure that weighs the soul down
+HOSTILE_COST = 3    # Hatred: regions that resist every step
+SLUGGISH_COST = 2   # Gluttony: wide, sluggish corridors
+
+
+def derive_seed(seed, label):
+    """Stable 64-bit sub-seed for a named random stream"""
+    digest = hashlib.sha256(("%s:%s" % (seed, label)).encode("utf-8")).hexdigest()
+    return int(digest[:16], 16)
+
+
+class MazeGenerator(object):
+    def __init__(self, width, height, seed=None, algorithm="backtracker"):
+        """seed: fixed int seed, a random.Random to draw seeds from, or None
+        algorithm: name of the base carving algorithm (see maze_algorithms)"""
+        self.width = width
+        self.height = height
+        self.maze = MazeGrid(width, height)
+        self.algorithm = algorithm
+        self._carve = get_algorithm(algorithm)
+        
+        if isinstance(seed, random.Random):
+            self.seed = None
+            self._seed_source = seed
+        else:
+            self.seed = seed
+            self._seed_source = random
+        self.last_seed = None
+        self.rng = random.Random(self.seed)  # Replaced per stream on generation
+        
+    def generate_sinful_maze(self, chosen_sins, chosen_virtues):
+        """Generate maze based on specific moral choices"""
+        seed = self.seed if self.seed is not None else self._seed_source.getrandbits(64)
+        self.last_seed = seed
+        
+        self.maze = MazeGrid(self.width, self.height)
+        self.rng = random.Random(derive_seed(seed, "base"))
+        
+        # Create basic maze structure
+        self._carve(self.maze, self.rng)
+        
+        # Add sin-specific maze features
+        self._apply_sin_effects(chosen_sins, seed)
+        
+        # Add virtue-specific maze features
+        self._apply_virtue_effects(chosen_virtues, seed)
+        
+        # Ensure accessibility
+        self.maze.carve(1, 1)  # Start
+        self.maze.carve(self.width-2, self.height-2)  # End
+        
+        return self.maze
+    
+    def generate_to_file(self, path, chosen_sins, chosen_virtues):
+        """Stream the maze row by row into a mapped maze file.
+        
+        Needs a streaming algorithm (e.g. eller); the base maze never exists
+        in memory and the sin/virtue effects are applied through the mapping.
+        Returns the open PackedMazeGrid, which the caller should close."""
+        rows = get_streaming_algorithm(self.algorithm)
+        seed = self.seed if self.seed is not None else self._seed_source.getrandbits(64)
+        self.last_seed = seed
+        
+        metadata = {
+            "algorithm": self.algorithm,
+            "sins": [[sin.name, sin.weight] for sin in chosen_sins],
+            "virtues": [[virtue.name, virtue.weight] for virtue in chosen_virtues]
+        }
+        self.rng = random.Random(derive_seed(seed, "base"))
+        write_maze_file(path, self.width, self.height,
+                        rows(self.width, self.height, self.rng), seed, metadata)
+        
+        self.maze = PackedMazeGrid(path, writable=True)
+        self._apply_sin_effects(chosen_sins, seed)
+        self._apply_virtue_effects(chosen_virtues, seed)
+        self.maze.carve(1, 1)  # Start
+        self.maze.carve(self.width-2, self.height-2)  # End
+        self.maze.flush()
+        
+        return self.maze
+    
+    def _apply_sin_effects(self, chosen_sins, seed=0):
+        """Apply specific effects based on chosen sins"""
+        sin_effects = {
+            "Wrath": self._add_aggressive_paths,
+            "Envy": self._add_deceptive_loops,
+            "Pride": self._add_complex_detours,
+            "Greed": self._add_treasure_traps,
+            "Lust": self._add_tempting_paths,
+            "Gluttony": self._add_wide_corridors,
+            "Sloth": self._add_blocked_shortcuts,
+            "Despair": self._add_dead_ends,
+            "Hatred": self._add_hostile_maze_sections
+        }
+        
+        # Effects apply in name order, not selection order, so the same set
+        # of choices always makes the same maze (the cache key relies on it)
+        for sin in sorted(chosen_sins, key=lambda sin: (sin.name, sin.weight)):
+            if sin.name in sin_effects:
+                # Each effect draws from its own stream so effects stay independent
+                self.rng = random.Random(derive_seed(seed, "sin:" + sin.name))
+                sin_effects[sin.name](sin.weight)
+    
+    def _apply_virtue_effects(self, chosen_virtues, seed=0):
+        """Apply specific effects based on chosen virtues"""
+        virtue_effects = {
+            "Compassion": self._add_helpful_shortcuts,
+            "Humility": self._simplify_paths,
+            "Forgiveness": self._remove_some_barriers,
+            "Patience": self._add_steady_progress_paths,
+            "Courage": self._add_direct_routes,
+            "Wisdom": self._add_efficient_connections,
+            "Hope": self._add_guiding_lights
+        }
+        
+        for virtue in sorted(chosen_virtues, key=lambda virtue: (virtue.name, virtue.weight)):
+            if virtue.name in virtue_effects:
+                self.rng = random.Random(derive_seed(seed, "virtue:" + virtue.name))
+                virtue_effects[virtue.name](virtue.weight)
+    
+    def _add_aggressive_paths(self, intensity):
+        """Wrath: Add sharp turns and aggressive angles"""
+        for _ in range(intensity):
+            x, y = self.rng.randrange(1, self.width-1, 2), self.rng.randrange(1, self.height-1, 2)
+            if self.maze.is_open(x, y):
+                # Create sharp branching paths
+                directions = [(0, 2), (2, 0), (0, -2), (-2, 0)]
+                for dx, dy in directions:
+                    if self.rng.random() < 0.4:
+                        nx, ny = x + dx, y + dy
+                        if 0 < nx < self.width-1 and 0 < ny < self.height-1:
+                            self.maze.carve(x + dx//2, y + dy//2)
+                            self.maze.carve(nx, ny)
+    
+    def _add_deceptive_loops(self, intensity):
+        """Envy: Add loops that seem to lead somewhere but circle back"""
+        for _ in range(intensity // 2):
+            start_x = self.rng.randrange(3, self.width-3, 2)
+            start_y = self.rng.randrange(3, self.height-3, 2)
+            if self.maze.is_open(start_x, start_y):
+                # Create small loops
+                loop_points = [
+                    (start_x, start_y), (start_x+2, start_y),
+                    (start_x+2, start_y+2), (start_x, start_y+2)
+                ]
+                for i in range(len(loop_points)):
+                    curr = loop_points[i]
+                    next_point = loop_points[(i+1) % len(loop_points)]
+                    self._connect_points(curr, next_point)
+    
+    def _add_complex_detours(self, intensity):
+        """Pride: Add unnecessarily complex paths"""
+        for _ in range(intensity):
+            x, y = self.rng.randrange(1, self.width-1, 2), self.rng.randrange(1, self.height-1, 2)
+            if self.maze.is_open(x, y):
+                # Create winding detours
+                path_length = self.rng.randint(3, 6)
+                curr_x, curr_y = x, y
+                for _ in range(path_length):
+                    directions = [(2, 0), (-2, 0), (0, 2), (0, -2)]
+                    self.rng.shuffle(directions)
+                    for dx, dy in directions:
+                        nx, ny = curr_x + dx, curr_y + dy
+                        if 0 < nx < self.width-1 and 0 < ny < self.height-1:
+                            self.maze.carve(curr_x + dx//2, curr_y + dy//2)
+                            self.maze.carve(nx, ny)
+                            curr_x, curr_y = nx, ny
+                            break
+    
+    def _add_helpful_shortcuts(self, intensity):
+        """Compassion: Add some helpful shortcuts"""
+        for _ in range(intensity):
+            x1 = self.rng.randrange(1, self.width//2, 2)
+            y1 = self.rng.randrange(1, self.height-1, 2)
+            x2 = self.rng.randrange(self.width//2, self.width-1, 2)
+            y2 = self.rng.randrange(1, self.height-1, 2)
+            
+            if self.maze.is_open(x1, y1) and self.maze.is_open(x2, y2):
+                self._connect_points((x1, y1), (x2, y2))
+    
+    def _connect_points(self, p1, p2):
+        """Connect two points with a path"""
+        x1, y1 = p1
+        x2, y2 = p2
+        
+        # Carve whole segments at once, clipped to the maze interior
+        x_start, x_end = max(min(x1, x2), 1), min(max(x1, x2), self.width-2)
+        y_start, y_end = max(min(y1, y2), 1), min(max(y1, y2), self.height-2)
+        
+        # Simple L-shaped connection
+        if self.rng.random() < 0.5:
+            # Go horizontal first, then vertical
+            if x_start <= x_end:
+                self.maze.carve_row(y1, x_start, x_end)
+            if y_start <= y_end:
+                self.maze.carve_column(x2, y_start, y_end)
+        else:
+            # Go vertical first, then horizontal
+            if y_start <= y_end:
+                self.maze.carve_column(x1, y_start, y_end)
+            if x_start <= x_end:
+                self.maze.carve_row(y2, x_start, x_end)
+    
+    def _random_open_cell(self, tries=20):
+        """A random open interior cell, or None if none was found"""
+        for _ in range(tries):
+            x, y = self.rng.randrange(1, self.width-1), self.rng.randrange(1, self.height-1)
+            if self.maze.is_open(x, y):
+                return x, y
+        return None
+    
+    def _add_treasure_traps(self, intensity):
+        """Greed: Scatter costly treasure cells along the paths"""
+        for _ in range(intensity):
+            cell = self._random_open_cell()
+            if cell:
+                self.maze.set_cost(cell[0], cell[1], TRAP_COST)
+    
+    def _add_wide_corridors(self, intensity):
+        """Gluttony: Bloat some corridors into wide, sluggish halls"""
+        for _ in range(intensity // 3 + 1):
+            cell = self._random_open_cell()
+            if not cell:
+                continue
+            x, y = cell
+            for cy in range(max(1, y-1), min(self.height-2, y+1) + 1):
+                self.maze.carve_row(cy, max(1, x-1), min(self.width-2, x+1))
+                for cx in range(max(1, x-1), min(self.width-2, x+1) + 1):
+                    self.maze.set_cost(cx, cy, SLUGGISH_COST)
+    
+    def _add_hostile_maze_sections(self, intensity):
+        """Hatred: Make whole regions costly to cross"""
+        for _ in range(intensity // 4 + 1):
+            cell = self._random_open_cell()
+            if not cell:
+                continue
+            x, y = cell
+            radius = self.rng.randint(2, 4)
+            for cy in range(max(1, y-radius), min(self.height-2, y+radius) + 1):
+                for cx in range(max(1, x-radius), min(self.width-2, x+radius) + 1):
+                    if self.maze.is_open(cx, cy) and self.maze.cost(cx, cy) < HOSTILE_COST:
+                        self.maze.set_cost(cx, cy, HOSTILE_COST)
+    
+    # Placeholder implementations for other sin/virtue effects
+    def _add_tempting_paths(self, intensity): pass
+    def _add_blocked_shortcuts(self, intensity): pass
+    def _add_dead_ends(self, intensity): pass
+    def _simplify_paths(self, intensity): pass
+    def _remove_some_barriers(self, intensity): pass
+    def _add_steady_progress_paths(self, intensity): pass
+    def _add_direct_routes(self, intensity): pass
+    def _add_efficient_connections(self, intensity): pass
+    def _add_guiding_lights(self, intensity): pass
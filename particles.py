@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Particle effects stored as NumPy arrays
+Compatible with Python 2.7
+Dependencies: pygame, numpy
+"""
+
+import numpy as np
+import pygame
+
+GRAVITY = 0.1
+MAX_COLORS = 256
+
+# Pixels pygame.draw.circle fills for radius 1, 2 and 3, relative to the centre.
+# Each disc contains the smaller ones, so offsets are grouped by the smallest
+# radius that covers them and each group is drawn for every particle that big.
+_DOT_OFFSETS = (
+    (1, ((-1, -1), (-1, 0), (0, -1), (0, 0))),
+    (2, ((-2, -1), (-2, 0), (-1, -2), (-1, 1), (0, -2), (0, 1), (1, -1), (1, 0))),
+    (3, ((-3, -1), (-3, 0), (-2, -2), (-2, 1), (-1, -3), (-1, 2),
+         (0, -3), (0, 2), (1, -2), (1, 1), (2, -1), (2, 0))),
+)
+DIRTY_RECT_LIMIT = 64  # More live particles than this report one rect per tile
+PARTICLE_TILE = 32
+
+
+class ParticleSystem(object):
+    """Struct-of-arrays particle store with a fixed capacity.
+
+    Live particles are packed at the front of preallocated arrays (x, y, vx,
+    vy, life, max_life and an index into a small colour palette). update()
+    integrates all of them with whole-array operations and compacts out the
+    dead ones by boolean mask through scratch arrays, so nothing is
+    allocated after construction. When full, new particles overwrite old
+    slots in ring order. draw() writes pixels straight into the surface.
+    """
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.count = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.max_life = np.ones(capacity, dtype=np.int32)
+        self.color = np.zeros(capacity, dtype=np.uint8)
+        self.palette = []
+        self._color_index = {}
+        self._alive = np.zeros(capacity, dtype=bool)
+        # Compaction goes through one scratch array per dtype
+        self._scratch = {dtype: np.zeros(capacity, dtype=dtype)
+                         for dtype in (np.float64, np.int32, np.uint8)}
+        self._overwrite = 0
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        """Remove every particle, keeping the buffers and palette"""
+        self.count = 0
+        self._overwrite = 0
+
+    def _palette_index(self, color):
+        color = tuple(color)
+        index = self._color_index.get(color)
+        if index is None:
+            if len(self.palette) == MAX_COLORS:
+                raise ValueError("particle palette is limited to %d colours" % MAX_COLORS)
+            index = self._color_index[color] = len(self.palette)
+            self.palette.append(color)
+        return index
+
+    def _slots(self, amount):
+        """Indices for amount new particles, recycling old slots once full"""
+        free = min(amount, self.capacity - self.count)
+        slots = np.arange(self.count, self.count + free)
+        self.count += free
+        if free < amount:
+            recycled = (self._overwrite + np.arange(amount - free)) % self.capacity
+            self._overwrite = int(recycled[-1] + 1) % self.capacity
+            slots = np.concatenate((slots, recycled))
+        return slots
+
+    def add_particle(self, x, y, color, velocity, life):
+        if self.count < self.capacity:
+            slot = self.count
+            self.count += 1
+        else:
+            slot = self._overwrite
+            self._overwrite = (slot + 1) % self.capacity
+        self.x[slot] = x
+        self.y[slot] = y
+        self.vx[slot], self.vy[slot] = velocity
+        self.life[slot] = self.max_life[slot] = life
+        self.color[slot] = self._palette_index(color)
+
+    def add_particles(self, xs, ys, color, vxs, vys, lives):
+        """Add a batch of same-coloured particles from arrays"""
+        slots = self._slots(len(xs))
+        self.x[slots] = xs
+        self.y[slots] = ys
+        self.vx[slots] = vxs
+        self.vy[slots] = vys
+        self.life[slots] = lives
+        self.max_life[slots] = lives
+        self.color[slots] = self._palette_index(color)
+
+    def update(self):
+        n = self.count
+        if not n:
+            return
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.life[:n] -= 1
+        self.vy[:n] += GRAVITY
+
+        alive = self._alive[:n]
+        np.greater(self.life[:n], 0, out=alive)
+        survivors = int(np.count_nonzero(alive))
+        if survivors == n:
+            return
+        for values in (self.x, self.y, self.vx, self.vy, self.life, self.max_life, self.color):
+            scratch = self._scratch[values.dtype.type]
+            np.compress(alive, values[:n], out=scratch[:survivors])
+            values[:survivors] = scratch[:survivors]
+        self.count = survivors
+        self._overwrite = 0
+
+    def draw(self, screen):
+        """Draw live particles; returns the screen rects they cover"""
+        n = self.count
+        if not n:
+            return []
+        xs = self.x[:n].astype(np.intp)  # Truncates toward zero, like int()
+        ys = self.y[:n].astype(np.intp)
+        sizes = np.maximum(1, 3 * self.life[:n] // self.max_life[:n])
+        width, height = screen.get_size()
+
+        # Particles well inside the surface skip the per-pixel bounds test;
+        # those entirely outside it are not drawn at all
+        inner = (xs >= 3) & (xs < width - 2) & (ys >= 3) & (ys < height - 2)
+        edge = ~inner & (xs > -3) & (xs < width + 3) & (ys > -3) & (ys < height + 3)
+        pixels = pygame.surfarray.pixels2d(screen)
+        try:
+            # Flat view of the pixel rows, so each offset is one index add
+            step, pitch = pixels.strides
+            row = pitch // step
+            flat = np.lib.stride_tricks.as_strided(pixels, shape=(height * row,), strides=(step,))
+            mapped = np.array([screen.map_rgb(color) for color in self.palette], dtype=pixels.dtype)
+            colors = mapped[self.color[:n]]
+
+            base, pc, ps = (ys * row + xs)[inner], colors[inner], sizes[inner]
+            for radius, offsets in _DOT_OFFSETS:
+                if radius > 1:
+                    big = ps >= radius
+                    base, pc, ps = base[big], pc[big], ps[big]
+                for dx, dy in offsets:
+                    flat[base + (dy * row + dx)] = pc
+
+            px, py, pc, ps = xs[edge], ys[edge], colors[edge], sizes[edge]
+            for radius, offsets in _DOT_OFFSETS:
+                if radius > 1:
+                    big = ps >= radius
+                    px, py, pc, ps = px[big], py[big], pc[big], ps[big]
+                for dx, dy in offsets:
+                    tx, ty = px + dx, py + dy
+                    inside = (tx >= 0) & (tx < width) & (ty >= 0) & (ty < height)
+                    flat[ty[inside] * row + tx[inside]] = pc[inside]
+            del flat
+        finally:
+            del pixels  # Unlocks the surface
+
+        bounds = screen.get_rect()
+        if n <= DIRTY_RECT_LIMIT:
+            return [bounds.clip(pygame.Rect(x - size, y - size, 2 * size, 2 * size))
+                    for x, y, size in zip(xs.tolist(), ys.tolist(), sizes.tolist())]
+
+        # One rect per occupied tile, grown to cover dots centred near its edges
+        # (tiles are shifted by one so centres just off-screen still count)
+        tile = PARTICLE_TILE
+        columns = width // tile + 3
+        drawn = inner | edge
+        occupied = np.unique((ys[drawn] // tile + 1) * columns + xs[drawn] // tile + 1)
+        rects = []
+        for index in occupied.tolist():
+            tile_y, tile_x = divmod(index, columns)
+            rects.append(bounds.clip(pygame.Rect((tile_x - 1) * tile - 3, (tile_y - 1) * tile - 3,
+                                                 tile + 6, tile + 6)))
+        return rects
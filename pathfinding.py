@@ -0,0 +1,685 @@
+# -*- coding: utf-8 -*-
+"""
+Shortest paths on maze grids
+Compatible with Python 2.7
+Dependencies: numpy
+
+All searches work on flat cell indices (y * width + x) over any grid with the
+MazeGrid cell API (width, height, buffer). Parent pointers and distances live
+in typed arrays instead of dicts of tuples (32-bit, widened to 64-bit once a
+grid's indices or costs pass 2**31 - 1), and paths come back as lists of
+(x, y) from start to end, or [] when the end cannot be reached.
+
+Grids with a cost layer (grid.costs, the small integer cost of stepping onto
+each cell) are solved with Dial's bucket-queue algorithm in O(V + C). Mazes
+that are mostly corridors can be compressed into a JunctionGraph first.
+"""
+
+import heapq
+from array import array
+
+UNSEEN = -1
+INT32_MAX = 2 ** 31 - 1
+try:
+    array("q")
+    _WIDE_TYPECODE = "q"
+except ValueError:  # Python 2 has no "q"; its "l" is 64 bits except on Windows
+    _WIDE_TYPECODE = "l"
+
+
+def _int_array(size, limit):
+    """size UNSEEN entries able to hold values up to limit: 32-bit while they fit"""
+    return array("i" if limit <= INT32_MAX else _WIDE_TYPECODE, [UNSEEN]) * size
+
+
+def _indices(grid, start, end):
+    width = grid.width
+    return start[1] * width + start[0], end[1] * width + end[0]
+
+
+def _endpoints_open(grid, start, end):
+    return grid.is_open(start[0], start[1]) and grid.is_open(end[0], end[1])
+
+
+def _neighbors(index, width, size):
+    """Flat indices of the 4-neighbours of a cell, clipped to the grid"""
+    x = index % width
+    result = []
+    if x > 0:
+        result.append(index - 1)
+    if x < width - 1:
+        result.append(index + 1)
+    if index >= width:
+        result.append(index - width)
+    if index + width < size:
+        result.append(index + width)
+    return result
+
+
+def _trace(parent, index, width):
+    """Follow parent pointers back to the root (whose parent is itself)"""
+    path = []
+    while True:
+        path.append((index % width, index // width))
+        if parent[index] == index:
+            break
+        index = parent[index]
+    path.reverse()
+    return path
+
+
+def bfs_path(grid, start, end):
+    """Breadth-first search; optimal because every step costs 1"""
+    if not _endpoints_open(grid, start, end):
+        return []
+    width, size = grid.width, grid.width * grid.height
+    cells = grid.buffer
+    source, target = _indices(grid, start, end)
+
+    parent = _int_array(size, size)
+    parent[source] = source
+    frontier = [source]
+    while frontier and parent[target] == UNSEEN:
+        next_frontier = []
+        for index in frontier:
+            x = index % width
+            for neighbor in (index - 1 if x > 0 else -1,
+                             index + 1 if x < width - 1 else -1,
+                             index - width, index + width):
+                if 0 <= neighbor < size and parent[neighbor] == UNSEEN and cells[neighbor] == 0:
+                    parent[neighbor] = index
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+
+    if parent[target] == UNSEEN:
+        return []
+    return _trace(parent, target, width)
+
+
+def astar_path(grid, start, end):
+    """A* with the Manhattan distance heuristic (consistent on 4-grids).
+
+    Heap entries are single ints encoding (f, -g, index) so ties prefer the
+    deepest node and no tuples are allocated.
+    """
+    if not _endpoints_open(grid, start, end):
+        return []
+    width, size = grid.width, grid.width * grid.height
+    cells = grid.buffer
+    source, target = _indices(grid, start, end)
+    goal_x, goal_y = end
+
+    parent = _int_array(size, size)
+    cost = _int_array(size, size)
+    parent[source] = source
+    cost[source] = 0
+    # key = (f * span + (span - 1 - g)) * size + index
+    span = size + 1
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y)) * span * size + (span - 1) * size + source]
+
+    while heap:
+        key = heapq.heappop(heap)
+        index = key % size
+        g = span - 1 - (key // size) % span
+        if g != cost[index]:
+            continue  # Stale entry
+        if index == target:
+            return _trace(parent, target, width)
+        g += 1
+        for neighbor in _neighbors(index, width, size):
+            if cells[neighbor] != 0:
+                continue
+            old = cost[neighbor]
+            if old == UNSEEN or g < old:
+                cost[neighbor] = g
+                parent[neighbor] = index
+                nx, ny = neighbor % width, neighbor // width
+                f = g + abs(nx - goal_x) + abs(ny - goal_y)
+                heapq.heappush(heap, (f * span + (span - 1 - g)) * size + neighbor)
+    return []
+
+
+def bidirectional_bfs_path(grid, start, end):
+    """BFS from both ends, always growing the smaller frontier by one level"""
+    if not _endpoints_open(grid, start, end):
+        return []
+    width, size = grid.width, grid.width * grid.height
+    cells = grid.buffer
+    source, target = _indices(grid, start, end)
+    if source == target:
+        return [start]
+
+    parents = (_int_array(size, size), _int_array(size, size))
+    depths = (_int_array(size, size), _int_array(size, size))
+    frontiers = ([source], [target])
+    for side, root in ((0, source), (1, target)):
+        parents[side][root] = root
+        depths[side][root] = 0
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        parent, depth = parents[side], depths[side]
+        other_depth = depths[1 - side]
+
+        # Finish the whole level so the best meeting point is found
+        best = None
+        next_frontier = []
+        for index in frontiers[side]:
+            level = depth[index] + 1
+            for neighbor in _neighbors(index, width, size):
+                if cells[neighbor] != 0:
+                    continue
+                if other_depth[neighbor] != UNSEEN:
+                    total = depth[index] + 1 + other_depth[neighbor]
+                    if best is None or total < best[0]:
+                        best = (total, index, neighbor)
+                if depth[neighbor] == UNSEEN:
+                    depth[neighbor] = level
+                    parent[neighbor] = index
+                    next_frontier.append(neighbor)
+        if best is not None:
+            _, near, far = best
+            half = _trace(parent, near, width)
+            rest = _trace(parents[1 - side], far, width)
+            rest.reverse()
+            path = half + rest
+            return path if side == 0 else path[::-1]
+        frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+    return []
+
+
+def dial_path(grid, start, end):
+    """Cheapest path when entering a cell costs a small integer (Dial's algorithm).
+
+    Distances are kept in a circular array of max_cost + 1 buckets, so each
+    cell is settled in O(1) amortized instead of paying for a binary heap.
+    """
+    if not _endpoints_open(grid, start, end):
+        return []
+    costs = grid.costs
+    if costs is None:
+        return bfs_path(grid, start, end)
+    width, size = grid.width, grid.width * grid.height
+    cells = grid.buffer
+    source, target = _indices(grid, start, end)
+
+    bucket_count = max(costs) + 1
+    buckets = [[] for _ in range(bucket_count)]
+    dist = _int_array(size, size * (bucket_count - 1))
+    parent = _int_array(size, size)
+    dist[source] = 0
+    parent[source] = source
+    buckets[0].append(source)
+    pending = 1
+    current = 0
+
+    while pending:
+        bucket = buckets[current % bucket_count]
+        while bucket:
+            index = bucket.pop()
+            pending -= 1
+            if dist[index] != current:
+                continue  # Settled earlier at a lower cost
+            if index == target:
+                return _trace(parent, target, width)
+            for neighbor in _neighbors(index, width, size):
+                if cells[neighbor] != 0:
+                    continue
+                candidate = current + costs[neighbor]
+                old = dist[neighbor]
+                if old == UNSEEN or candidate < old:
+                    dist[neighbor] = candidate
+                    parent[neighbor] = index
+                    buckets[candidate % bucket_count].append(neighbor)
+                    pending += 1
+        current += 1
+    return []
+
+
+class DistanceField(object):
+    """Cost to reach the goal from every cell, from a single reverse search.
+
+    Built once per maze (reverse BFS, or reverse Dial on weighted grids), it
+    answers per-move questions in O(1): how far a cell is from the goal and
+    how much cost a walk has wasted compared to the optimal route so far.
+    Unreachable cells and walls hold UNSEEN.
+    """
+    def __init__(self, grid, goal):
+        self.grid = grid
+        self.width = grid.width
+        self.goal = goal
+        self.distances = self._reverse_search(grid, goal)
+
+    @staticmethod
+    def _reverse_search(grid, goal):
+        width, size = grid.width, grid.width * grid.height
+        cells = grid.buffer
+        costs = grid.costs
+        max_cost = max(costs) if costs is not None else 1
+        distances = _int_array(size, size * max_cost)
+        if not grid.is_open(goal[0], goal[1]):
+            return distances
+        root = goal[1] * width + goal[0]
+        distances[root] = 0
+
+        if costs is None:
+            frontier = [root]
+            level = 0
+            while frontier:
+                level += 1
+                next_frontier = []
+                for index in frontier:
+                    for neighbor in _neighbors(index, width, size):
+                        if distances[neighbor] == UNSEEN and cells[neighbor] == 0:
+                            distances[neighbor] = level
+                            next_frontier.append(neighbor)
+                frontier = next_frontier
+            return distances
+
+        # Walking neighbor -> index costs costs[index], so that is the edge weight
+        bucket_count = max_cost + 1
+        buckets = [[] for _ in range(bucket_count)]
+        buckets[0].append(root)
+        pending = 1
+        current = 0
+        while pending:
+            bucket = buckets[current % bucket_count]
+            while bucket:
+                index = bucket.pop()
+                pending -= 1
+                if distances[index] != current:
+                    continue
+                candidate = current + costs[index]
+                for neighbor in _neighbors(index, width, size):
+                    if cells[neighbor] != 0:
+                        continue
+                    old = distances[neighbor]
+                    if old == UNSEEN or candidate < old:
+                        distances[neighbor] = candidate
+                        buckets[candidate % bucket_count].append(neighbor)
+                        pending += 1
+            current += 1
+        return distances
+
+    def distance(self, x, y):
+        """Cost from (x, y) to the goal, or None if it cannot be reached"""
+        value = self.distances[y * self.width + x]
+        return None if value == UNSEEN else value
+
+    def wasted(self, start, position, spent):
+        """Cost spent beyond the optimal route, given where the walk now stands"""
+        return spent + self.distances[position[1] * self.width + position[0]] - \
+            self.distances[start[1] * self.width + start[0]]
+
+    def waste_profile(self, path):
+        """Cumulative wasted cost after every step of a recorded walk"""
+        if not path:
+            return []
+        width, distances = self.width, self.distances
+        costs = self.grid.costs
+        start = distances[path[0][1] * width + path[0][0]]
+        spent = 0
+        profile = [0]
+        for x, y in path[1:]:
+            index = y * width + x
+            spent += 1 if costs is None else costs[index]
+            profile.append(spent + distances[index] - start)
+        return profile
+
+    def next_step(self, x, y):
+        """An open neighbour that lies on an optimal route to the goal, or None"""
+        index = y * self.width + x
+        here = self.distances[index]
+        if here in (UNSEEN, 0):
+            return None
+        cells, costs = self.grid.buffer, self.grid.costs
+        for neighbor in _neighbors(index, self.width, len(self.distances)):
+            value = self.distances[neighbor]
+            if value != UNSEEN and cells[neighbor] == 0 and \
+                    value + (1 if costs is None else costs[neighbor]) == here:
+                return neighbor % self.width, neighbor // self.width
+        return None
+
+
+class DynamicDistanceField(DistanceField):
+    """DistanceField kept exact while cells open, close or change cost.
+
+    This is Lifelong Planning A* run backwards from the goal with a zero
+    heuristic (the backward search at the core of D* Lite): after the cells
+    in a change are reported, only vertices whose cost-to-goal actually
+    changes are re-expanded, instead of searching the whole maze again.
+
+    An expansion costs about twenty times what one cell costs the reverse
+    search, so grids of at most REBUILD_SIZE cells, and changes whose repair
+    expands more than 1/REBUILD_FRACTION of the grid, are rebuilt from
+    scratch instead.
+    """
+    INFINITY = INT32_MAX
+    REBUILD_SIZE = 128 * 128
+    REBUILD_FRACTION = 64
+
+    def __init__(self, grid, goal):
+        DistanceField.__init__(self, grid, goal)
+        self._track()
+
+    def _track(self):
+        """Start repairing from the current distances, which are consistent"""
+        typecode = self.distances.typecode
+        if typecode != "i":
+            self.INFINITY = 2 ** (8 * self.distances.itemsize - 1) - 1
+        # UNSEEN in _rhs stands for INFINITY, so a consistent field's
+        # one-step lookaheads are a plain copy of its distances
+        self._rhs = self.distances[:]
+
+    def rebuild(self):
+        """Recompute every distance with one reverse search"""
+        self.distances = self._reverse_search(self.grid, self.goal)
+        self._track()
+
+    def _lookahead(self, index, size):
+        """Best one-step cost-to-goal of a cell from its neighbours' distances"""
+        grid = self.grid
+        if grid.buffer[index] != 0:
+            return self.INFINITY
+        if index == self.goal[1] * self.width + self.goal[0]:
+            return 0
+        cells, costs, distances = grid.buffer, grid.costs, self.distances
+        best = self.INFINITY
+        for neighbor in _neighbors(index, self.width, size):
+            value = distances[neighbor]
+            if value != UNSEEN and cells[neighbor] == 0:
+                value += 1 if costs is None else costs[neighbor]
+                if value < best:
+                    best = value
+        return best
+
+    def _update_vertex(self, index, size, heap):
+        rhs = self._rhs[index] = self._lookahead(index, size)
+        g = self.distances[index]
+        g = self.INFINITY if g == UNSEEN else g
+        if g != rhs:
+            heapq.heappush(heap, (min(g, rhs), index))
+
+    def update_cells(self, changed):
+        """Repair distances after the given (x, y) cells were opened, closed or re-costed.
+
+        Returns the number of vertices whose distance was re-expanded, or
+        the grid size when the field was rebuilt instead.
+        """
+        width, size = self.width, len(self.distances)
+        budget = size // self.REBUILD_FRACTION
+        changed = list(changed)
+        if size <= self.REBUILD_SIZE or len(changed) > budget:
+            self.rebuild()
+            return size
+
+        distances, rhs = self.distances, self._rhs
+        infinity = self.INFINITY
+        heap = []
+        touched = set()
+        for x, y in changed:
+            index = y * width + x
+            touched.add(index)
+            touched.update(_neighbors(index, width, size))
+        for index in touched:
+            self._update_vertex(index, size, heap)
+
+        expanded = 0
+        while heap:
+            key, index = heapq.heappop(heap)
+            g = distances[index]
+            g = infinity if g == UNSEEN else g
+            lookahead = rhs[index]
+            lookahead = infinity if lookahead == UNSEEN else lookahead
+            if g == lookahead or key != min(g, lookahead):
+                continue  # Stale entry
+            expanded += 1
+            if expanded > budget:
+                self.rebuild()  # Past the point where a fresh search is cheaper
+                return size
+            if g > lookahead:
+                distances[index] = lookahead
+            else:
+                distances[index] = UNSEEN
+                self._update_vertex(index, size, heap)
+            for neighbor in _neighbors(index, width, size):
+                self._update_vertex(neighbor, size, heap)
+        return expanded
+
+    def path(self, start):
+        """An optimal path from start to the goal by descending the field, [] if unreachable.
+
+        Also [] if the descent gets stuck, as it can on a field that was not
+        repaired after the grid changed; every cell is visited at most once.
+        """
+        if self.distance(*start) is None:
+            return []
+        goal = tuple(self.goal)
+        path = [tuple(start)]
+        for _ in range(len(self.distances)):
+            if path[-1] == goal:
+                return path
+            step = self.next_step(*path[-1])
+            if step is None:
+                return []
+            path.append(step)
+        return []
+
+
+def _padded_open(grid):
+    """(height + 2, width + 2) uint8 mask of open cells inside a wall border"""
+    import numpy as np
+    cells = grid.cells if hasattr(grid, "cells") else grid.to_grid().cells
+    live = np.zeros((grid.height + 2, grid.width + 2), dtype=np.uint8)
+    live[1:-1, 1:-1] = cells == 0
+    return live
+
+
+def _open_degree(live):
+    """Number of open 4-neighbours of every cell of a padded mask"""
+    import numpy as np
+    degree = np.zeros_like(live)
+    degree[1:-1, 1:-1] = live[:-2, 1:-1] + live[2:, 1:-1] + live[1:-1, :-2] + live[1:-1, 2:]
+    return degree * live
+
+
+def _fill_dead_ends(live, keep):
+    """Prune cells with at most one open neighbour from a padded mask in place"""
+    import numpy as np
+    padded_width = live.shape[1]
+    steps = (1, -1, padded_width, -padded_width)
+    degree = _open_degree(live)
+    candidates = np.flatnonzero(live.ravel() & (degree.ravel() <= 1)).tolist()
+    degree = bytearray(degree.tobytes())
+    flat = bytearray(live.tobytes())
+
+    stack = [index for index in candidates if index not in keep]
+    while stack:
+        index = stack.pop()
+        if not flat[index]:
+            continue
+        flat[index] = 0
+        for step in steps:
+            neighbor = index + step
+            if flat[neighbor]:
+                degree[neighbor] -= 1
+                if degree[neighbor] <= 1 and neighbor not in keep:
+                    stack.append(neighbor)
+    live.ravel()[:] = np.frombuffer(flat, dtype=np.uint8)
+
+
+def dead_end_fill(grid, keep=()):
+    """Mark open cells that only lead into dead ends.
+
+    Repeatedly removes open cells with at most one open neighbour (never the
+    cells in keep). Returns a bytearray with 1 for every removed cell; what
+    is left holds every simple path between the kept cells.
+    """
+    padded_width = grid.width + 2
+    live = _padded_open(grid)
+    before = live[1:-1, 1:-1].copy()
+    _fill_dead_ends(live, set((y + 1) * padded_width + x + 1 for x, y in keep))
+    return bytearray((before & (live[1:-1, 1:-1] ^ 1)).tobytes())
+
+
+class JunctionGraph(object):
+    """Maze compressed to junctions joined by weighted corridor edges.
+
+    After dead-end filling, every remaining cell with exactly two open
+    neighbours is part of a corridor; only junctions, corridor ends and the
+    kept cells (e.g. start and goal) become nodes. Edges remember their
+    first cell, so a node path is expanded back to cells by re-walking the
+    corridors. Queries must use kept cells or junctions as endpoints.
+
+    Internally cells are indexed on the grid padded with a one-cell wall
+    border, so walks never need bounds checks.
+    """
+    def __init__(self, grid, keep=(), fill_dead_ends=True):
+        import numpy as np
+        self.grid = grid
+        self.padded_width = padded_width = grid.width + 2
+        self._steps = steps = (1, -1, padded_width, -padded_width)
+
+        keep = set(self._index(x, y) for x, y in keep if grid.is_open(x, y))
+        live = _padded_open(grid)
+        if fill_dead_ends:
+            _fill_dead_ends(live, keep)
+        degree = _open_degree(live)
+        nodes = set(np.flatnonzero(live.ravel() & (degree.ravel() != 2)).tolist())
+        nodes.update(keep)
+        self.nodes = nodes
+        self._live = live = bytearray(live.tobytes())
+
+        costs = None
+        if grid.costs is not None:
+            padded = np.ones((grid.height + 2, padded_width), dtype=np.uint8)
+            padded[1:-1, 1:-1] = np.frombuffer(grid.costs, dtype=np.uint8).reshape(grid.height, grid.width)
+            costs = bytearray(padded.tobytes())
+
+        # Walk every corridor from both ends; each walk gives one directed edge
+        self.edges = {}
+        for node in nodes:
+            out = []
+            for step in steps:
+                first = node + step
+                if not live[first]:
+                    continue
+                previous, current = node, first
+                weight = 1 if costs is None else costs[first]
+                while current not in nodes:
+                    for next_step in steps:
+                        following = current + next_step
+                        if live[following] and following != previous:
+                            break
+                    previous, current = current, following
+                    weight += 1 if costs is None else costs[current]
+                if current != node:
+                    out.append((current, weight, first))
+            self.edges[node] = out
+
+    def has_node(self, x, y):
+        """Whether (x, y) can be a path endpoint"""
+        return 0 <= x < self.grid.width and 0 <= y < self.grid.height and self._index(x, y) in self.nodes
+
+    @property
+    def edge_count(self):
+        return sum(len(out) for out in self.edges.values())
+
+    def _index(self, x, y):
+        return (y + 1) * self.padded_width + x + 1
+
+    def _coords(self, index):
+        y, x = divmod(index, self.padded_width)
+        return x - 1, y - 1
+
+    def _expand(self, node, first, target):
+        """Cells of the corridor from node (exclusive) through first to target"""
+        live, steps = self._live, self._steps
+        cells = []
+        previous, current = node, first
+        while True:
+            cells.append(self._coords(current))
+            if current == target:
+                return cells
+            for step in steps:
+                following = current + step
+                if live[following] and following != previous:
+                    break
+            previous, current = current, following
+
+    def path(self, start, end):
+        """Cheapest cell path between two nodes, [] if unreachable"""
+        source, target = self._index(*start), self._index(*end)
+        if source not in self.nodes or target not in self.nodes:
+            raise ValueError("path endpoints must be kept cells or junctions")
+
+        dist = {source: 0}
+        parent = {source: None}
+        heap = [(0, source)]
+        while heap:
+            current_dist, node = heapq.heappop(heap)
+            if current_dist > dist[node]:
+                continue
+            if node == target:
+                break
+            for other, weight, first in self.edges[node]:
+                candidate = current_dist + weight
+                if candidate < dist.get(other, candidate + 1):
+                    dist[other] = candidate
+                    parent[other] = (node, first)
+                    heapq.heappush(heap, (candidate, other))
+        if target not in parent:
+            return []
+
+        legs = []
+        node = target
+        while parent[node] is not None:
+            previous, first = parent[node]
+            legs.append((previous, first, node))
+            node = previous
+        path = [tuple(start)]
+        for previous, first, node in reversed(legs):
+            path.extend(self._expand(previous, first, node))
+        return path
+
+
+def junction_path(grid, start, end):
+    """Shortest path solved on the dead-end-filled junction graph"""
+    if not _endpoints_open(grid, start, end):
+        return []
+    return JunctionGraph(grid, keep=(start, end)).path(start, end)
+
+
+def path_cost(grid, path):
+    """Total cost of walking a path (its step count on unweighted grids)"""
+    costs = grid.costs
+    if costs is None:
+        return max(len(path) - 1, 0)
+    width = grid.width
+    return sum(costs[y * width + x] for x, y in path[1:])
+
+
+PATHFINDERS = {
+    "bfs": bfs_path,
+    "astar": astar_path,
+    "bidirectional": bidirectional_bfs_path,
+    "dial": dial_path,
+    "junction": junction_path
+}
+UNIT_COST_METHODS = ("bfs", "astar", "bidirectional")
+
+
+def find_path(grid, start, end, method="bfs"):
+    """Shortest path by a named method: bfs, astar, bidirectional, dial or junction.
+
+    The unit-cost methods fall back to Dial's algorithm on grids that carry
+    a cost layer, so the result is always the cheapest path.
+    """
+    try:
+        search = PATHFINDERS[method]
+    except KeyError:
+        raise ValueError("Unknown pathfinding method %r (choose from %s)"
+                         % (method, ", ".join(sorted(PATHFINDERS))))
+    if method in UNIT_COST_METHODS and getattr(grid, "costs", None) is not None:
+        search = dial_path
+    return search(grid, start, end)
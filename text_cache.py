@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of rendered text surfaces
+Compatible with Python 2.7
+Dependencies: pygame (through the fonts passed in)
+"""
+
+from collections import OrderedDict
+
+
+class TextCache(object):
+    """LRU of font.render results keyed by (font, text, color, antialias).
+
+    Static labels are rasterized once, and dynamic strings such as the
+    capacity counters only when their text changes. Surfaces are shared
+    between callers, so they must not be drawn on or have their alpha set.
+    """
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def render(self, font, text, antialias, color, background=None):
+        """Same arguments as font.render, answered from the cache when possible"""
+        key = (font, text, tuple(color), antialias,
+               None if background is None else tuple(background))
+        surface = self._entries.pop(key, None)
+        if surface is None:
+            self.misses += 1
+            if background is None:
+                surface = font.render(text, antialias, color)
+            else:
+                surface = font.render(text, antialias, color, background)
+        else:
+            self.hits += 1
+        self._entries[key] = surface  # Most recently used goes last
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Fog of war: which maze cells the player has seen
+Compatible with Python 2.7
+Dependencies: numpy
+"""
+
+import math
+
+_STENCILS = {}
+_OFFSETS = {}
+SPAN_REVEAL_CENTRES = 16  # reveal_discs writes row spans up to this many centres
+
+# Shadowcasting quadrants as (x per row, x per column, y per row, y per column)
+_QUADRANTS = ((0, 1, -1, 0), (0, 1, 1, 0), (1, 0, 0, 1), (-1, 0, 0, 1))
+
+
+def vision_stencil(radius):
+    """Row spans of the disc of offsets within radius, cached per radius.
+
+    Returns ((dy, half_width), ...): on row dy every dx with
+    abs(dx) <= half_width satisfies dx * dx + dy * dy <= radius * radius.
+    """
+    stencil = _STENCILS.get(radius)
+    if stencil is None:
+        limit = radius * radius
+        reach = int(math.floor(radius))
+        spans = []
+        for dy in range(-reach, reach + 1):
+            half = int(math.sqrt(limit - dy * dy))
+            while half * half + dy * dy > limit:
+                half -= 1
+            while (half + 1) * (half + 1) + dy * dy <= limit:
+                half += 1
+            spans.append((dy, half))
+        stencil = _STENCILS[radius] = tuple(spans)
+    return stencil
+
+
+def stencil_offsets(radius):
+    """(dxs, dys) arrays of every offset in the vision disc, cached per radius"""
+    import numpy as np
+    offsets = _OFFSETS.get(radius)
+    if offsets is None:
+        pairs = [(dx, dy) for dy, half in vision_stencil(radius) for dx in range(-half, half + 1)]
+        offsets = _OFFSETS[radius] = (np.array([dx for dx, _ in pairs], dtype=np.intp),
+                                      np.array([dy for _, dy in pairs], dtype=np.intp))
+    return offsets
+
+
+class VisibilityMask(object):
+    """Revealed cells, one byte per cell indexed by y * width + x.
+
+    `bits` is the flat bytearray for per-cell tests in draw loops and `cells`
+    a (height, width) numpy view of it, so a reveal writes one slice per row.
+    `(x, y) in mask` and `mask.add((x, y))` keep the old set interface.
+    """
+    def __init__(self, width, height):
+        import numpy as np
+        self.width = width
+        self.height = height
+        self.bits = bytearray(width * height)
+        self.cells = np.frombuffer(self.bits, dtype=np.uint8).reshape(height, width)
+
+    def __contains__(self, pos):
+        x, y = pos
+        return 0 <= x < self.width and 0 <= y < self.height and self.bits[y * self.width + x] == 1
+
+    def __len__(self):
+        return self.bits.count(b"\x01")
+
+    def add(self, pos):
+        x, y = pos
+        self.bits[y * self.width + x] = 1
+
+    def clear(self):
+        self.cells.fill(0)
+
+    def _snapshot(self, x, y, radius):
+        """Copy of the square around (x, y) that a reveal of radius can touch"""
+        reach = int(math.floor(radius))
+        return self._snapshot_box(x - reach, y - reach, x + reach + 1, y + reach + 1)
+
+    def _snapshot_box(self, x_start, y_start, x_end, y_end):
+        """Copy of the cells in [x_start, x_end) x [y_start, y_end), clipped to the mask"""
+        x_start, y_start = max(0, x_start), max(0, y_start)
+        return x_start, y_start, self.cells[y_start:max(y_start, y_end), x_start:max(x_start, x_end)].copy()
+
+    def _fresh(self, snapshot):
+        """(x, y) cells revealed since the snapshot was taken"""
+        import numpy as np
+        x_start, y_start, before = snapshot
+        rows, columns = before.shape
+        ys, xs = np.nonzero(self.cells[y_start:y_start + rows, x_start:x_start + columns] != before)
+        return list(zip((xs + x_start).tolist(), (ys + y_start).tolist()))
+
+    def reveal_disc(self, x, y, radius):
+        """Reveal every cell within Euclidean radius of (x, y), walls or not.
+
+        Returns the newly revealed (x, y) cells.
+        """
+        snapshot = self._snapshot(x, y, radius)
+        cells, width, height = self.cells, self.width, self.height
+        for dy, half in vision_stencil(radius):
+            row = y + dy
+            if 0 <= row < height:
+                x_start, x_end = max(0, x - half), min(width, x + half + 1)
+                if x_start < x_end:
+                    cells[row, x_start:x_end] = 1
+        return self._fresh(snapshot)
+
+    def reveal_discs(self, xs, ys, radius):
+        """Reveal the discs around many centres at once, as a walk along them would.
+
+        The centres are marked on a small boolean image of their bounding
+        box, which is ORed into the mask once per disc offset, so the cost
+        depends on the area walked rather than the number of steps (a few
+        centres just get their disc rows written). Returns the newly
+        revealed (x, y) cells.
+        """
+        import numpy as np
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        if not len(xs):
+            return []
+        x_min, y_min = int(xs.min()), int(ys.min())
+        centres = np.zeros((int(ys.max()) - y_min + 1, int(xs.max()) - x_min + 1), dtype=bool)
+        centres[ys - y_min, xs - x_min] = True
+        rows, columns = centres.shape
+
+        reach = int(math.floor(radius))
+        snapshot = self._snapshot_box(x_min - reach, y_min - reach,
+                                      x_min + columns + reach, y_min + rows + reach)
+        cells, width, height = self.cells, self.width, self.height
+        if len(xs) <= SPAN_REVEAL_CENTRES:
+            # Short walks: one slice per disc row per centre is cheaper
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                for dy, half in vision_stencil(radius):
+                    row = y + dy
+                    if 0 <= row < height:
+                        cells[row, max(0, x - half):min(width, x + half + 1)] = 1
+            return self._fresh(snapshot)
+        for dx, dy in zip(*stencil_offsets(radius)):
+            # Shifted image clipped to the grid
+            left, top = x_min + int(dx), y_min + int(dy)
+            x_start, y_start = max(0, left), max(0, top)
+            x_end, y_end = min(width, left + columns), min(height, top + rows)
+            if x_start < x_end and y_start < y_end:
+                cells[y_start:y_end, x_start:x_end] |= centres[y_start - top:y_end - top,
+                                                               x_start - left:x_end - left]
+        return self._fresh(snapshot)
+
+    def reveal_shadowcast(self, grid, x, y, radius):
+        """Reveal the cells of grid visible from (x, y) within radius.
+
+        Symmetric recursive shadowcasting (Albert Ford's formulation, run
+        with an explicit stack): each quadrant is scanned row by row, and
+        walls split a row's slope interval so only lit cells are visited.
+        A floor cell is seen only if it is symmetric (its centre lies inside
+        the interval), so seeing is mutual. Slopes are kept as integer
+        fractions; cells outside the grid count as walls. Returns the newly
+        revealed (x, y) cells.
+        """
+        snapshot = self._snapshot(x, y, radius)
+        self._shadowcast(grid, x, y, radius)
+        return self._fresh(snapshot)
+
+    def reveal_shadowcasts(self, grid, xs, ys, radius):
+        """Shadowcast from many cells at once; returns the newly revealed (x, y) cells"""
+        import numpy as np
+        xs = np.asarray(xs, dtype=np.intp)
+        ys = np.asarray(ys, dtype=np.intp)
+        if not len(xs):
+            return []
+        reach = int(math.floor(radius))
+        snapshot = self._snapshot_box(int(xs.min()) - reach, int(ys.min()) - reach,
+                                      int(xs.max()) + reach + 1, int(ys.max()) + reach + 1)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self._shadowcast(grid, x, y, radius)
+        return self._fresh(snapshot)
+
+    def _shadowcast(self, grid, x, y, radius):
+        """Mark the cells of grid visible from (x, y) (see reveal_shadowcast)"""
+        width, height = self.width, self.height
+        cells, bits = grid.buffer, self.bits
+        limit = radius * radius
+        reach = int(math.floor(radius))
+        bits[y * width + x] = 1
+
+        for x_row, x_col, y_row, y_col in _QUADRANTS:
+            # (depth, start slope numerator, denominator, end numerator, denominator)
+            rows = [(1, -1, 1, 1, 1)]
+            while rows:
+                depth, start_num, start_den, end_num, end_den = rows.pop()
+                if depth > reach:
+                    continue
+                first = (2 * depth * start_num + start_den) // (2 * start_den)  # Round ties up
+                last = -((end_den - 2 * depth * end_num) // (2 * end_den))      # Round ties down
+                previous_wall = None
+                for col in range(first, last + 1):
+                    tx = x + depth * x_row + col * x_col
+                    ty = y + depth * y_row + col * y_col
+                    inside = 0 <= tx < width and 0 <= ty < height
+                    wall = not inside or cells[ty * width + tx] != 0
+                    if inside and col * col + depth * depth <= limit and (
+                            wall or (col * start_den >= depth * start_num and
+                                     col * end_den <= depth * end_num)):
+                        bits[ty * width + tx] = 1
+                    if previous_wall and not wall:
+                        start_num, start_den = 2 * col - 1, 2 * depth
+                    elif previous_wall is False and wall:
+                        rows.append((depth + 1, start_num, start_den, 2 * col - 1, 2 * depth))
+                    previous_wall = wall
+                if previous_wall is False:
+                    rows.append((depth + 1, start_num, start_den, end_num, end_den))